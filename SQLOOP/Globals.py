@@ -3,6 +3,8 @@
 from functools import cached_property, cache
 import sqlite3, hashlib, re, os, logging, shutil, sys, itertools, random, copy
 from time import sleep
+from threading import Lock
+from collections import OrderedDict
 
 
 from typing import (
@@ -33,6 +35,8 @@ class Connection(sqlite3.Connection):
 		return f"{object.__repr__(self)[:-1]} '{self.filename}'>"
 
 tableCreationCommand = re.compile(r"^\W*CREATE\W+(TEMP|TEMPORARY\W)?\W*(TABLE|INDEX)(\W+IF\W+NOT\W+EXISTS)?\W+(\w[.])?", flags=re.ASCII|re.IGNORECASE)
+changeCommand = re.compile(r"^\W*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(?P<table>[\w.]+)", flags=re.IGNORECASE)
+readOnlyCommand = re.compile(r"^\W*(SELECT|WITH(?!.*\b(INSERT|UPDATE|DELETE|REPLACE)\b))\b", flags=re.IGNORECASE|re.DOTALL)
 
 _NOT_SET = object()
 _T = TypeVar("_T")
@@ -41,8 +45,8 @@ _T = TypeVar("_T")
 class Mode: pass
 class ReadMode: pass
 class WriteMode: pass
-Mode        = Literal["r", "w"]
-ReadMode    = Literal["r"]
+Mode        = Literal["r", "ri", "w"]
+ReadMode    = Literal["r", "ri"]
 WriteMode   = Literal["w"]
 class Rest(Iterator): pass
 class All(Iterator): pass
@@ -127,7 +131,11 @@ class SQLOOP:
 	```
 	Defaults to a 'snake_case'-version of the class name (In the above example it would be "my_object")
 	"""
-	params : list
+	params : tuple
+	parenthesized : bool = False
+	"""Whether `format` encloses the SQL of the object in parentheses, as it does for comparisons and subqueries."""
+
+	__slots__ = ()
 
 	def __init_subclass__(cls, *args, name : str|None=None, **kwargs) -> None:
 		if name is not None:
@@ -165,14 +173,25 @@ class SQLOOP:
 	def __matmul__(self, other : sqlite3.Connection) -> sqlite3.Cursor:
 		from SQLOOP._core.Databases import Fetcher, Query
 		if hasattr(other, "execute"):
-			return other.execute(str(self), self.params)
+			return other.execute(*compileItem(self))
 		return NotImplemented
 
+	def compile(self) -> tuple[str,tuple]:
+		"""The SQL of the object together with its parameters, flattened into a tuple. Nodes of queries produce both in
+		one pass over their children and keep the result."""
+		return str(self), tuple(self.params)
+	
+	def compileParams(self) -> tuple:
+		"""The parameters that `compile` gives, without rendering the SQL of nodes that haven't been compiled yet."""
+		return tuple(self.params)
+
 	@property
 	def params(self):
-		return []
+		return ()
 
 class SQLTuple(SQLOOP, tuple):
+
+	__slots__ = ()
 	
 	@overload
 	def __new__(cls, iterable : Iterable): ...
@@ -182,18 +201,70 @@ class SQLTuple(SQLOOP, tuple):
 	def __new__(cls, *args):
 		if len(args) == 1 and isinstance(args[0], Iterable):
 			args = tuple(args[0])
-		from SQLOOP._core.Structures import SanitizedValue
-		return tuple.__new__(cls, map(lambda x:x if isinstance(x, SQLOOP) else SQLTuple(x) if isinstance(x, Iterable) else SanitizedValue(x), args))
+		return tuple.__new__(cls, map(sqlItem, args))
+	
+	def extend(self, items : Iterable) -> "SQLTuple":
+		"""This tuple followed by `items`, which are converted like the items given to `SQLTuple`. The items of this
+		tuple are shared with the new tuple, not converted again."""
+		return tuple.__new__(SQLTuple, (*self, *map(sqlItem, items)))
 	
 	def __str__(self):
-		return f"({', '.join(map(format, self))})"
+		return self.compile()[0]
+
+	def compile(self) -> tuple[str,tuple]:
+		sql, params = compileItems(self, ", ", enclosed=True)
+		return f"({sql})", params
+	
+	def compileParams(self) -> tuple:
+		return compileItemsParams(self)
 	
 	@property
 	def params(self):
-		out = []
-		for item in self:
-			out.extend(getReadyAttr(item, "params", []))
-		return out
+		return self.compile()[1]
+
+def sqlItem(item : Any) -> SQLOOP:
+	"""Converts an item of an `SQLTuple`. SQL-objects are kept as they are, other iterables become `SQLTuple`s and
+	everything else a `SanitizedValue`."""
+	if isinstance(item, SQLOOP):
+		return item
+	elif isinstance(item, Iterable) and not isinstance(item, (str, bytes)):
+		return SQLTuple(item)
+	else:
+		from SQLOOP._core.Structures import SanitizedValue
+		return SanitizedValue(item)
+
+def compileItem(item : Any, enclosed : bool=False) -> tuple[str,tuple]:
+	"""The SQL and the flat parameters of an item of an SQL-object (See `SQLOOP.compile`). Enclosed items are rendered
+	the way `format` renders them."""
+	if isinstance(item, type):
+		return format(item) if enclosed else str(item), ()
+	elif isinstance(item, SQLOOP):
+		sql, params = item.compile()
+		return f"({sql})" if enclosed and item.parenthesized else sql, params
+	else:
+		return format(item) if enclosed else str(item), tuple(getReadyAttr(item, "params", ()))
+
+def compileItems(items : Iterable, sep : str, enclosed : bool=False) -> tuple[str,tuple]:
+	"""The SQL of `items` joined by `sep` and their parameters concatenated in order."""
+	sqls = []
+	params = []
+	for item in items:
+		sql, itemParams = compileItem(item, enclosed)
+		sqls.append(sql)
+		params.extend(itemParams)
+	return sep.join(sqls), tuple(params)
+
+def compileItemsParams(items : Iterable) -> tuple:
+	"""The parameters that `compileItems` gives for `items`, without rendering their SQL."""
+	params = []
+	for item in items:
+		if isinstance(item, type):
+			continue
+		elif isinstance(item, SQLOOP):
+			params.extend(item.compileParams())
+		else:
+			params.extend(getReadyAttr(item, "params", ()))
+	return tuple(params)
 
 class Nothing:
 	def __eq__(self, other):
@@ -271,6 +342,88 @@ class CachedClassProperty:
 	def __repr__(self):
 		return f"{object.__repr__(self)[:-1]} name={self.name!r}>"
 
+class LRUCache:
+	"""Thread-safe mapping that holds at most `capacity` items and evicts the least recently used item first. Keeps
+	count of hits, misses and evictions, as well as the approximate size in bytes of the cached values."""
+
+	capacity : int
+	hits : int
+	misses : int
+	evictions : int
+	bytes : int
+
+	def __init__(self, capacity : int=1024):
+		self.capacity = capacity
+		self.lock = Lock()
+		self._data = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.bytes = 0
+
+	def __repr__(self):
+		return f"{object.__repr__(self)[:-1]} {' '.join(map(lambda pair : '{}={}'.format(*pair), self.stats().items()))}>"
+	
+	def __len__(self):
+		return len(self._data)
+	
+	def __contains__(self, key):
+		return key in self._data
+
+	def get(self, key, default=None):
+		with self.lock:
+			try:
+				value = self._data[key]
+			except KeyError:
+				self.misses += 1
+				return default
+			self._data.move_to_end(key)
+			self.hits += 1
+			return value
+	
+	def __getitem__(self, key):
+		if (value := self.get(key, _NOT_SET)) is _NOT_SET:
+			raise KeyError(key)
+		return value
+
+	def __setitem__(self, key, value):
+		with self.lock:
+			if key in self._data:
+				self.bytes -= sys.getsizeof(self._data[key])
+				self._data.move_to_end(key)
+			self._data[key] = value
+			self.bytes += sys.getsizeof(value)
+			self._evict()
+	
+	def __delitem__(self, key):
+		with self.lock:
+			self.bytes -= sys.getsizeof(self._data.pop(key))
+
+	def _evict(self):
+		while len(self._data) > self.capacity:
+			_, value = self._data.popitem(last=False)
+			self.bytes -= sys.getsizeof(value)
+			self.evictions += 1
+
+	def resize(self, capacity : int):
+		"""Change the capacity, evicting the least recently used items if the cache holds more than `capacity` items."""
+		with self.lock:
+			self.capacity = capacity
+			self._evict()
+
+	def clear(self):
+		with self.lock:
+			self._data.clear()
+			self.bytes = 0
+	
+	def resetStats(self):
+		with self.lock:
+			self.hits = self.misses = self.evictions = 0
+
+	def stats(self) -> dict[str,int]:
+		return {"hits" : self.hits, "misses" : self.misses, "evictions" : self.evictions, "bytes" : self.bytes,
+				"size" : len(self._data), "capacity" : self.capacity}
+
 class SQLDict(dict):
 
 	def __init__(self, iterable : Iterable=None, *args, **kwargs):
@@ -394,6 +547,53 @@ SQL_TYPE_NAMES = {
 	None : "NULL"
 }
 
+PRAGMA_PROFILES = {
+	"bulk-load" : {
+		"journal_mode" : "MEMORY",
+		"synchronous" : "OFF",
+		"cache_size" : -262144,
+		"temp_store" : "MEMORY",
+		"busy_timeout" : 30000
+	},
+	"read-heavy" : {
+		"journal_mode" : "WAL",
+		"synchronous" : "NORMAL",
+		"cache_size" : -65536,
+		"temp_store" : "MEMORY",
+		"mmap_size" : 268435456,
+		"busy_timeout" : 5000
+	},
+	"durable" : {
+		"journal_mode" : "WAL",
+		"synchronous" : "FULL",
+		"cache_size" : -2000,
+		"temp_store" : "DEFAULT",
+		"busy_timeout" : 10000
+	}
+}
+"""Named sets of PRAGMA-statements for `Database` subclasses. "bulk-load" trades durability for insert speed,
+"read-heavy" favours concurrent readers and large caches and "durable" syncs every commit to disk."""
+
+NUMPY_DTYPES = {
+	"INTEGER" : "int64",
+	"INT" : "int64",
+	"TINYINT" : "int64",
+	"SMALLINT" : "int64",
+	"MEDIUMINT" : "int64",
+	"BIGINT" : "int64",
+	"UNSIGNED_BIG_INT" : "int64",
+	"INT2" : "int64",
+	"INT8" : "int64",
+	"REAL" : "float64",
+	"DOUBLE" : "float64",
+	"DOUBLE_PRECISION" : "float64",
+	"FLOAT" : "float64",
+	"NUMERIC" : "float64",
+	"DECIMAL" : "float64",
+	"BOOLEAN" : "bool"
+}
+"""NumPy dtypes of the SQL types that columnar fetches turn into typed arrays. Other types are fetched as objects."""
+
 OPERATOR_DUNDERS = {
 	"==" : "__eq__",
 	"!=" : "__ne__",
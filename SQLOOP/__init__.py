@@ -1,8 +1,9 @@
 
 from SQLOOP.Globals import SQLOOP, SQLDict, sql
 from SQLOOP._core.Databases import Database
+from SQLOOP._core.AsyncDatabases import AsyncDatabase
 from SQLOOP._core.Exceptions import *
 from SQLOOP._core.Functions import verifyDatabase, correctDatabase
-from SQLOOP._core.Tree import Branch
+from SQLOOP._core.Tree import Branch, TreeIndex
 import SQLOOP._core.Words as Words
-from SQLOOP._core.Structures import Column, Table, Index, Operable
+from SQLOOP._core.Structures import Column, Table, Index, Operable, Placeholder
@@ -0,0 +1,223 @@
+
+from SQLOOP.Globals import *
+import SQLOOP.Globals as Globals
+from SQLOOP._core.Structures import Table, Column, Index, IndexMeta
+from SQLOOP._core.Statistics import fingerprint, literalPattern
+
+advisedCommand = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+scanPattern = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)\b")
+automaticPattern = re.compile(r"^SEARCH (?:TABLE )?(?P<table>\w+) USING AUTOMATIC (?:COVERING |PARTIAL )*INDEX \((?P<columns>[^)]*)\)")
+tablesPattern = re.compile(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+(?:\s*,\s*\w+)*)", re.IGNORECASE)
+constraintPattern = re.compile(r"(?:\b(\w+)\.)?\b(\w+)\s*(==|=|<=|>=|<|>|\bIS\b|\bIN\b|\bBETWEEN\b)", re.IGNORECASE)
+clausePattern = re.compile(r"\b(?:WHERE|ON)\b(.*?)(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bJOIN\b|$)", re.IGNORECASE | re.DOTALL)
+EQUALITY_OPERATORS = frozenset({"==", "=", "IS", "IN"})
+
+def splitScopes(sql : str) -> list[str]:
+	"""Splits an SQL-statement into the text of each of its SELECT-statements, with their subqueries replaced by `?`."""
+	scopes = []
+	def walk(text : str) -> str:
+		out = []
+		depth = 0
+		start = None
+		for i, c in enumerate(text):
+			if c == "(":
+				if depth == 0:
+					start = i
+				depth += 1
+			elif c == ")" and depth:
+				depth -= 1
+				if depth == 0:
+					inner = text[start+1:i]
+					if advisedCommand.match(inner):
+						scopes.append(walk(inner))
+						out.append("?")
+					else:
+						out.append(f"({walk(inner)})")
+			elif depth == 0:
+				out.append(c)
+		return "".join(out)
+	scopes.append(walk(literalPattern.sub("?", sql)))
+	return scopes
+
+def constrainedColumns(sql : str, table : str, columns : Iterable[str]) -> tuple[str]:
+	"""Names of the columns of `table` that are constrained in the WHERE- or ON-clauses of the statements that read from
+	`table`, with columns compared for equality first and then the first column compared as a range."""
+	columns = {column.lower() for column in columns}
+	table = table.lower()
+	equal, ranged = [], []
+	for scope in splitScopes(sql):
+		tables = {name.strip().lower() for match in tablesPattern.finditer(scope) for name in match.group(1).split(",")}
+		if table not in tables:
+			continue
+		for clause in clausePattern.finditer(scope):
+			for qualifier, column, operator in constraintPattern.findall(clause.group(1)):
+				column = column.lower()
+				if column not in columns or (qualifier and qualifier.lower() != table):
+					continue
+				if operator.upper() in EQUALITY_OPERATORS:
+					if column not in equal:
+						equal.append(column)
+				elif column not in ranged:
+					ranged.append(column)
+	return tuple(equal) + tuple(column for column in ranged if column not in equal)[:1]
+
+class QueryShape:
+	"""A distinct query as seen by the `IndexAdvisor`, with its plan and how much time has been spent on it."""
+
+	sql : str
+	plan : list[str]|None
+	count : int
+	cost : float
+
+	def __init__(self, sql : str):
+		self.sql = sql
+		self.plan = None
+		self.count = 0
+		self.cost = 0.0
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} count={self.count} cost={self.cost:.3g} sql={self.sql!r}>"
+
+	def scans(self) -> dict[str,tuple[str]|None]:
+		"""Tables that are scanned in the plan, and the columns of automatic indexes that SQLite built for them, if it
+		did."""
+		tables = {}
+		for detail in self.plan or ():
+			if (match := automaticPattern.match(detail)) is not None:
+				tables[match.group("table").lower()] = tuple(column.lower() for column in re.findall(r"(\w+)\s*[=<>]", match.group("columns")))
+			elif (match := scanPattern.match(detail)) is not None:
+				tables.setdefault(match.group("table").lower(), None)
+		return tables
+
+class IndexProposal:
+	"""An index that the `IndexAdvisor` proposes, together with the time spent on the queries it should speed up."""
+
+	table : type[Table]
+	columns : tuple[type[Column]]
+	cost : float
+	"""Seconds spent executing and fetching the queries that scan `table`."""
+	count : int
+	"""Number of times those queries were run."""
+	rows : int
+	queries : list[str]
+	created : bool
+
+	def __init__(self, table : type[Table], columns : tuple[type[Column]], rows : int):
+		self.table = table
+		self.columns = columns
+		self.rows = rows
+		self.cost = 0.0
+		self.count = 0
+		self.queries = []
+		self.created = False
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} {sql(self.index)!r} cost={self.cost:.3g} count={self.count} rows={self.rows}>"
+
+	def __str__(self):
+		lines = [f"class {self.index.__name__}(Index, name={self.index.__sql_name__!r}):", f"\ttable = {self.table.__name__}"]
+		lines.extend(f"\t{chr(ord('A') + i)} = {column.__name__}" for i, column in enumerate(self.columns))
+		return "\n".join(lines)
+
+	@cached_property
+	def index(self) -> type[Index]:
+		"""The proposed index, as an `Index` subclass that can be given to `Database.createIndex`."""
+		name = "_".join(("advised", str(self.table), *map(str, self.columns)))
+		attributes = {"table" : self.table}
+		attributes.update((chr(ord("A") + i), column) for i, column in enumerate(self.columns))
+		return IndexMeta("".join(map(str.capitalize, name.split("_"))), (Index,), attributes, name=name)
+
+class IndexAdvisor:
+	"""Runs `EXPLAIN QUERY PLAN` on every distinct query (See `fingerprint`) served by the worker threads and keeps
+	track of the time spent on each. Queries that SCAN a table, or make SQLite build an automatic index for it, are
+	turned into `IndexProposal`s of indexes on the columns they constrain, ranked by the time spent on them.
+	```python
+	advisor = database.adviseIndexes(minRows=10000)
+	...
+	for proposal in database.indexAdvice():
+		print(proposal)
+	```
+	"""
+
+	LOG = Globals.LOGGER.getChild("IndexAdvisor")
+
+	minRows : int
+	"""Tables with fewer rows than this are not proposed any indexes."""
+	autoCreate : bool
+	"""Whether proposed indexes are created by `Database.indexAdvice`."""
+	shapes : dict[str,QueryShape]
+	lock : Lock
+
+	def __init__(self, minRows : int=1000, autoCreate : bool=False):
+		self.minRows = minRows
+		self.autoCreate = autoCreate
+		self.shapes = {}
+		self.lock = Lock()
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} shapes={len(self.shapes)} minRows={self.minRows} autoCreate={self.autoCreate}>"
+
+	def observe(self, _connection : sqlite3.Connection, sql : str, params : list, seconds : float):
+		"""Called by the worker thread after serving a statement. Explains the statement the first time its shape is
+		seen."""
+		if not isinstance(sql, str) or not advisedCommand.match(sql):
+			return
+		key = fingerprint(sql)
+		with self.lock:
+			if (shape := self.shapes.get(key)) is None:
+				shape = self.shapes[key] = QueryShape(sql)
+			shape.count += 1
+			shape.cost += seconds
+		if shape.plan is None:
+			try:
+				shape.plan = [detail for *_, detail in _connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+			except Exception as e:
+				self.LOG.exception(e)
+				shape.plan = []
+
+	def forget(self):
+		"""Drops the plans of all shapes, so that they are explained again the next time they are run. The time spent on
+		them is kept."""
+		with self.lock:
+			for shape in self.shapes.values():
+				shape.plan = None
+
+	def reset(self):
+		with self.lock:
+			self.shapes = {}
+
+	def proposals(self, database : "Database") -> list[IndexProposal]:
+		"""Indexes that would remove the scans seen so far on tables of the database with at least `minRows` rows,
+		ranked by the time spent on the queries that scan them. Indexes already in the database are not proposed."""
+		with self.lock:
+			shapes = list(self.shapes.values())
+		proposals : dict[tuple,IndexProposal] = {}
+		rows : dict[str,int] = {}
+		existing : dict[str,set[tuple[str]]] = {}
+		for shape in shapes:
+			for name, automatic in shape.scans().items():
+				if name not in database.tables:
+					continue
+				table = database.tables[name]
+				names = automatic or constrainedColumns(shape.sql, name, map(str, table.columns))
+				if not names:
+					continue
+				if name not in rows:
+					rows[name] = next(iter(database(f"SELECT COUNT(*) FROM {name};")))[0]
+					existing[name] = self.indexedColumns(database, name)
+				if rows[name] < self.minRows or any(columns[:len(names)] == names for columns in existing[name]):
+					continue
+				columns = tuple(table.columns[column] for column in names)
+				if (proposal := proposals.get((name, names))) is None:
+					proposal = proposals[name, names] = IndexProposal(table, columns, rows[name])
+				proposal.cost += shape.cost
+				proposal.count += shape.count
+				proposal.queries.append(shape.sql)
+		return sorted(proposals.values(), key=lambda proposal:proposal.cost, reverse=True)
+
+	@staticmethod
+	def indexedColumns(database : "Database", table : str) -> set[tuple[str]]:
+		indexes = {}
+		for index, column in database("SELECT il.name, ii.name FROM pragma_index_list(?) AS il, pragma_index_info(il.name) AS ii ORDER BY il.name, ii.seqno;", [table]):
+			indexes.setdefault(index, []).append(str(column).lower())
+		return set(map(tuple, indexes.values()))
@@ -9,12 +9,14 @@ class Aggregate(Operable):
 	
 	X : Column
 
+	__slots__ = ("X",)
+
 	def __init__(self, X : Column):
 		self.X = X
 
 	def __repr__(self):
 		from SQLOOP._core.Functions import pluralize
-		return f"<{pluralize(self.__class__.__base__.__name__)}.{self.__class__.__name__} {', '.join(map(lambda name: f'{name}={self.__dict__.get(name)}'.format, self.__annotations__))}>"
+		return f"<{pluralize(self.__class__.__base__.__name__)}.{self.__class__.__name__} {', '.join(map(lambda name: f'{name}={getattr(self, name, None)}', self.__annotations__))}>"
 		
 	def __str__(self) -> str:
 		return f"{self.__class__.__name__}({self.X})"
@@ -25,16 +27,18 @@ class Aggregate(Operable):
 	def __hash__(self):
 		return self.__str__().__hash__()
 
-class AVG(Aggregate): pass
-class COUNT(Aggregate): pass
-class MAX(Aggregate): pass
-class MIN(Aggregate): pass
-class SUM(Aggregate): pass
-class TOTAL(Aggregate): pass
+class AVG(Aggregate): __slots__ = ()
+class COUNT(Aggregate): __slots__ = ()
+class MAX(Aggregate): __slots__ = ()
+class MIN(Aggregate): __slots__ = ()
+class SUM(Aggregate): __slots__ = ()
+class TOTAL(Aggregate): __slots__ = ()
 
 class GROUP_CONCAT(Aggregate):
 
 	Y : str
+
+	__slots__ = ("Y",)
 	
 	def __init__(self, X : Column, Y : str=","):
 		self.X = X
@@ -43,4 +47,4 @@ class GROUP_CONCAT(Aggregate):
 	def __str__(self) -> str:
 		return f"{self.__class__.__name__}({self.X}, {self.Y})"
 	
-class STRING_AGG(GROUP_CONCAT): pass
\ No newline at end of file
+class STRING_AGG(GROUP_CONCAT): __slots__ = ()
\ No newline at end of file
@@ -0,0 +1,153 @@
+from contextlib import asynccontextmanager
+from queue import Empty as EmptyQueueException
+from typing import Awaitable
+import asyncio
+from SQLOOP.Globals import *
+import SQLOOP.Globals as Globals
+from SQLOOP._core.Databases import *
+from SQLOOP._core.ThreadConnection import ThreadConnection, StreamCursor
+
+class AsyncFetcher:
+	"""Asynchronous counterpart of `Fetcher`. Rows are streamed with `async for`, while awaiting the fetcher gives the
+	single value of a singlet query or a list of all rows."""
+
+	LOG = Globals.LOGGER.getChild("AsyncFetcher")
+
+	query : SelectStatement|BoundQuery|str
+	_connection : ThreadConnection
+	_cursor : StreamCursor|None
+
+	def __init__(self, connection : ThreadConnection, query : SelectStatement|BoundQuery|str, params : list=None):
+		self._connection = connection
+		self.query = query
+		self.params = query.params if params is None else params
+		self._cursor = None
+	
+	def __repr__(self):
+		return f"{object.__repr__(self)[:-1]} query={str(self.query)} params={self.params}>"
+
+	@property
+	def cols(self) -> int|None:
+		return self.query.cols if isinstance(self.query, (SelectStatement, BoundQuery)) else None
+
+	def __await__(self):
+		return self.fetch().__await__()
+
+	async def fetch(self) -> list|Any:
+		if isinstance(self.query, (SelectStatement, BoundQuery)) and self.query.singlet:
+			row = (await self._connection.submit(str(self.query), self.params)).fetchone()
+			return (row or [None])[0] if self.cols == 1 else row
+		return [row async for row in self]
+
+	async def __aiter__(self):
+		"""Streams the rows of the query. The stream is closed when the iteration ends, including when the `async for`
+		is left early through `break`, `return` or an exception, in which case the rest of the query is cancelled."""
+		loop = asyncio.get_running_loop()
+		ready = asyncio.Event()
+		self._cursor = cursor = await self._connection.submit(str(self.query), self.params, stream=True,
+			listener=lambda :loop.call_soon_threadsafe(ready.set))
+		try:
+			while True:
+				try:
+					chunk = cursor.nextChunk(block=False)
+				except EmptyQueueException:
+					ready.clear()
+					if cursor.buffer.empty():
+						await ready.wait()
+					continue
+				if chunk is None:
+					return
+				for row in chunk:
+					yield row[0] if self.cols == 1 else row
+		finally:
+			cursor.close()
+
+	async def aclose(self):
+		if self._cursor is not None:
+			self._cursor.close()
+
+class AsyncDatabase:
+	"""Asynchronous front-end to an opened `Database`. Statements are queued on the worker thread of the database and
+	their results are delivered to the event loop, so waiting for a query never blocks the loop.
+	```python
+	database = AsyncDatabase(MyDatabase("database.db", "w"))
+
+	await database(INSERT - INTO - MyTable - (ID, Name) - VALUES - (1, "Fredrik"))
+	name = await database[Name, MyTable, ID == 1]
+	async for name in database[Name, MyTable]:
+		...
+	async with database.transaction():
+		await database(UPDATE (MyTable) - SET (Name = "Eddrik") - WHERE (ID == 1))
+	```
+	"""
+
+	database : Database
+
+	def __init__(self, database : Database):
+		self.database = database
+
+	def __getattr__(self, name):
+		return getattr(self.database, name)
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} of {object.__repr__(self.database)}>"
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, excType, exc, traceback):
+		self.close()
+
+	@property
+	def _connection(self) -> ThreadConnection:
+		return self.database._connection
+
+	@overload
+	def __call__(self, query : Query|Word|type[Word]) -> Awaitable: ...
+	@overload
+	def __call__(self, query : str, params : list[Any]) -> Awaitable: ...
+	@final
+	def __call__(self, query : str|Query|Word|type[Word], params : list[Any]=[]) -> Awaitable:
+		"""Returns an `AsyncFetcher` for SELECT-statements and an awaitable that completes once the statement has been
+		executed for all other statements."""
+		if isinstance(query, str):
+			if Globals.readOnlyCommand.match(query):
+				return AsyncFetcher(self._connection, query, params)
+			else:
+				return self._execute(query, params)
+		elif isinstance(query, SQLOOP):
+			if isinstance(query, SelectStatement):
+				return AsyncFetcher(self._connection, query)
+			else:
+				return self._execute(str(query), query.params)
+		else:
+			raise ValueError(f"Trying to call database with seomthing other than a 'str' or a 'Query' object.\ndatabase({query}, {params})")
+
+	async def _execute(self, string : str, params : list):
+		await self._connection.submit(string, params)
+
+	def __getitem__(self, items : tuple[Column|Table|Comparison]) -> AsyncFetcher:
+		if not type(items) is tuple:
+			items = (items, )
+		if (planned := self.database.planQuery(items)) is None:
+			return self(self.database.createQuery(items))
+		plan, params = planned
+		return AsyncFetcher(self._connection, BoundQuery(plan, params))
+
+	@asynccontextmanager
+	async def transaction(self):
+		"""Runs the statements awaited inside the `async with`-block in one transaction, which is rolled back if the
+		block raises an exception."""
+		await self("BEGIN;")
+		try:
+			yield self
+		except BaseException:
+			await self("ROLLBACK;")
+			raise
+		await self("COMMIT;")
+
+	async def commit(self):
+		await self("COMMIT;")
+
+	def close(self):
+		self.database.close()
@@ -1,4 +1,6 @@
 
+from contextlib import contextmanager
+import time
 from SQLOOP.Globals import *
 import SQLOOP.Globals as Globals
 from SQLOOP._core.Structures import *
@@ -8,22 +10,25 @@ from SQLOOP._core.Expressions import *
 from SQLOOP._core.Words import *
 from SQLOOP._core.Aggregates import *
 from SQLOOP._core.ThreadConnection import ThreadConnection
+from SQLOOP._core.Statistics import SlowQueryLog
+from SQLOOP._core.Advisor import IndexAdvisor, IndexProposal
 
 class Fetcher:
-	"""Fetches data from a cursor. Consumes the cursor object during iteration/indexation."""
+	"""Fetches data from a cursor. Consumes the cursor object during iteration/indexation. Rows are streamed from the
+	connection in chunks, and abandoning the iteration cancels the rest of the query."""
 
 	LOG = Globals.LOGGER.getChild("Fetcher")
 
-	query : SelectStatement
+	query : "SelectStatement|BoundQuery"
 	_connection : Connection
 	cols : int
 	resultsLength : int
 
-	def __new__(cls, connection : Connection, query : SelectStatement, *args, **kwargs):
+	def __new__(cls, connection : Connection, query : SelectStatement, *args, singlet : bool=None, **kwargs):
 		
-		assert isinstance(query, SelectStatement), "Fetcher must be given a SelectStatement."
+		assert isinstance(query, (SelectStatement, BoundQuery)), "Fetcher must be given a SelectStatement."
 
-		if query.singlet:
+		if query.singlet if singlet is None else singlet:
 			try:
 				res = query @ connection
 				ret = (res.fetchone() or [None])[0] if query.cols == 1 else res.fetchone()
@@ -38,11 +43,14 @@ class Fetcher:
 		if Globals.MAX_DEBUG: cls.LOG.debug(f"Created Fetcher from: {str(query)!r}, {query.params}")
 		return super().__new__(cls)
 
-	def __init__(self, connection : Connection, query : SelectStatement):
+	def __init__(self, connection : Connection, query : SelectStatement, *, singlet : bool=None):
 
 		self._connection = connection
 		try:
-			self._cursor = query @ self._connection
+			if hasattr(self._connection, "stream"):
+				self._cursor = self._connection.stream(str(query), query.params)
+			else:
+				self._cursor = query @ self._connection
 		except Exception as e:
 			raise type(e)(f"Query: ({str(query)}, {query.params})\n"+e.args[0], *e.args[1:])
 		self.query = query
@@ -51,12 +59,16 @@ class Fetcher:
 		return f"{object.__repr__(self)[:-1]} query={str(self.query)} params={self.query.params}>"
 
 	def __iter__(self):
-		if self.query.cols == 1:
-			for (entry,) in self._cursor:
-				yield entry
-		else:
-			for entry in self._cursor:
-				yield entry
+		try:
+			if self.query.cols == 1:
+				for (entry,) in self._cursor:
+					yield entry
+			else:
+				for entry in self._cursor:
+					yield entry
+		finally:
+			if hasattr(self._cursor, "close"):
+				self._cursor.close()
 
 	def __next__(self):
 		match self.query.cols:
@@ -73,9 +85,296 @@ class Fetcher:
 	# 	else:
 	# 		return ((self.query - LIMIT(rowNumber+1,rowNumber+1)) @ self._connection).fetchone()
 	
+	@property
+	def columns(self) -> tuple[Column]:
+		"""The selected columns, with `*` expanded into the columns of the selected tables."""
+		query = self.query.prepared.query if isinstance(self.query, BoundQuery) else self.query
+		columns = []
+		for column in query.columns:
+			if column is ALL:
+				columns.extend(col for table in query.tables for col in table.columns)
+			else:
+				columns.append(column)
+		return tuple(columns)
+
+	@staticmethod
+	def dtype(column : Column, fixedWidth : bool=False) -> str:
+		"""The NumPy dtype of a column, as determined by its SQL type in `Globals.NUMPY_DTYPES`. Text columns with a
+		declared length, like `VARCHAR(20)`, are fixed width unicode strings if `fixedWidth` is True."""
+		sqlType = getattr(column, "type", None)
+		name = type(sqlType).__name__ if isinstance(sqlType, SQL_TYPE) else getattr(sqlType, "__name__", "")
+		if name in Globals.NUMPY_DTYPES:
+			return Globals.NUMPY_DTYPES[name]
+		elif fixedWidth and isinstance(sqlType, SQL_TYPE) and sqlType.args and name in ("VARCHAR", "CHAR", "NCHAR", "NVARCHAR", "CHARACTER"):
+			return f"U{sqlType.args[0]}"
+		else:
+			return "object"
+	
+	def toArrays(self, dtypes : dict[str,Any]=None, fixedWidth : bool=False) -> dict[str,"numpy.ndarray"]:
+		"""Consumes the results into one NumPy array per column, keyed by column name. The arrays are filled one streamed
+		chunk at a time, growing to twice their size whenever a chunk doesn't fit and trimmed to the number of rows at the
+		end, so the rows are never held as tuples all at once. The dtype of each column is taken from `dtypes` if given
+		there and otherwise from the SQL type of the column (See `dtype`). Columns that turn out to hold NULL or values
+		that don't fit the dtype (See `fits`) are fetched as objects instead."""
+		import numpy
+
+		columns = self.columns
+		names = []
+		for col in columns:
+			name = getattr(col, "__sql_name__", None) or str(col)
+			names.append(name if name not in names else f"{name}_{len(names)}")
+		dtypes = dtypes or {}
+		arrays = [numpy.empty(0, dtype=dtypes.get(name) or self.dtype(col, fixedWidth)) for name, col in zip(names, columns)]
+		if hasattr(self._cursor, "chunks"):
+			chunks = self._cursor.chunks()
+		else:
+			chunks = iter(lambda:self._cursor.fetchmany(ThreadConnection.CHUNK_SIZE), [])
+		n = size = 0
+		try:
+			for chunk in chunks:
+				end = n + len(chunk)
+				if end > size:
+					size = max(end, 2 * size)
+					for array in arrays:
+						array.resize(size, refcheck=False)
+				for i, values in enumerate(zip(*chunk)):
+					if not self.fits(arrays[i].dtype, values):
+						arrays[i] = arrays[i].astype(object)
+					try:
+						arrays[i][n:end] = values
+					except (TypeError, ValueError):
+						arrays[i] = arrays[i].astype(object)
+						arrays[i][n:end] = values
+				n = end
+		finally:
+			if hasattr(self._cursor, "close"):
+				self._cursor.close()
+		for array in arrays:
+			array.resize(n, refcheck=False)
+		return dict(zip(names, arrays))
+	
+	@staticmethod
+	def fits(dtype : "numpy.dtype", values : tuple) -> bool:
+		"""Whether all of the values can be put in an array of the given dtype as they are. Integers have to be within
+		the range of the dtype, floats can hold integers and floats, and strings and bytes have to be within the width
+		of the dtype. NULL fits none of them."""
+		match dtype.kind:
+			case "i" | "u":
+				import numpy
+				info = numpy.iinfo(dtype)
+				return all(type(value) is int and info.min <= value <= info.max for value in values)
+			case "f":
+				return all(type(value) is float or type(value) is int for value in values)
+			case "U":
+				width = dtype.itemsize // 4
+				return all(type(value) is str and len(value) <= width for value in values)
+			case "S":
+				return all(type(value) is bytes and len(value) <= dtype.itemsize for value in values)
+			case _:
+				return True
+	
+	def toDataFrame(self, dtypes : dict[str,Any]=None, fixedWidth : bool=False) -> "pandas.DataFrame":
+		"""Consumes the results into a pandas DataFrame built from `toArrays` without copying the arrays."""
+		import pandas
+		return pandas.DataFrame(self.toArrays(dtypes, fixedWidth), copy=False)
+
 	def __len__(self):
+		if isinstance(self.query, BoundQuery):
+			return self._connection.execute(f"SELECT COUNT(*) FROM ({self.query})", self.query.params).fetchone()[0]
 		return (SelectStatement(SELECT(COUNT(ALL)), *self.query.words[1:]) @ self._connection).fetchone()[0]
 
+class PreparedQuery:
+	"""A query whose SQL text and parameter layout are determined once, when prepared. Calling it with values for its
+	placeholders only binds the values into their parameter slots and executes the fixed SQL text."""
+
+	database : "Database"
+	query : Query
+	sql : str
+	params : tuple
+	"""The parameters of the query, with None in the slots of placeholders."""
+	slots : tuple[tuple[int,str]]
+	"""Pairs of parameter position and placeholder name."""
+	names : frozenset[str]
+	select : bool
+	singlet : bool
+	cols : int|None
+
+	def __init__(self, database : "Database|None", query : Query):
+		self.database = database
+		self.query = query
+		self.sql = str(query)
+		params = query.params
+		self.slots = tuple((i, param.value) for i, param in enumerate(params) if isinstance(param, Placeholder))
+		self.names = frozenset(name for _, name in self.slots)
+		self.params = tuple(None if isinstance(param, Placeholder) else param for param in params)
+		self.select = isinstance(query, SelectStatement)
+		self.singlet = self.select and query.singlet
+		self.cols = query.cols if self.select else None
+	
+	def __repr__(self):
+		return f"{object.__repr__(self)[:-1]} sql={self.sql!r} placeholders={tuple(name for _, name in self.slots)}>"
+	
+	def bind(self, **values : Any) -> list:
+		if missing := self.names.difference(values):
+			raise MissingArgument(f"No value given for placeholders: {', '.join(sorted(missing))}")
+		elif unknown := set(values).difference(self.names):
+			raise TypeError(f"{self!r} has no placeholders named: {', '.join(sorted(unknown))}")
+		params = list(self.params)
+		for i, name in self.slots:
+			params[i] = values[name]
+		return params
+
+	def __call__(self, **values : Any) -> Generator[tuple[Any],None,None]|Any|None:
+		return self.execute(self.database, self.bind(**values))
+	
+	def execute(self, database : "Database", params : list) -> Generator[tuple[Any],None,None]|Any|None:
+		"""Executes the query in the given database with already bound parameters."""
+		if self.select:
+			return Fetcher(database._connection, BoundQuery(self, params))
+		else:
+			database._connection.execute(self.sql, params)
+			return None
+
+class BoundQuery:
+	"""A prepared query together with the values of one call. Can be given to a `Fetcher` in place of a query."""
+
+	prepared : PreparedQuery
+	params : list
+
+	def __init__(self, prepared : PreparedQuery, params : list):
+		self.prepared = prepared
+		self.params = params
+	
+	def __str__(self):
+		return self.prepared.sql
+	
+	def __matmul__(self, other : Connection) -> sqlite3.Cursor:
+		return other.execute(self.prepared.sql, self.params)
+	
+	@property
+	def singlet(self) -> bool:
+		return self.prepared.singlet
+	
+	@property
+	def cols(self) -> int|None:
+		return self.prepared.cols
+
+class Blob:
+	"""Handle of a single BLOB value, opened with `Database.openBlob`. Wraps a `sqlite3.Blob` that lives in the worker
+	thread of the connection, so every read and write is done there incrementally and the value is never loaded as a
+	whole. Supports `read`, `readinto`, `write`, `seek`, `tell`, `len()` and indexing/slicing like a `sqlite3.Blob`.
+	```python
+	with database.openBlob(SequencesTable.Sequence, rowid) as blob:
+		buffer = bytearray(1 << 20)
+		for view in blob.chunksInto(buffer):
+			handle(view)
+	```
+	"""
+
+	CHUNK_SIZE : int = 1 << 20
+	"""Default number of bytes per chunk for `chunks` and `writeFrom`."""
+
+	_connection : ThreadConnection
+	_blob : "sqlite3.Blob"
+	readonly : bool
+	closed : bool
+
+	def __init__(self, connection : ThreadConnection, table : str, column : str, rowid : int, readonly : bool=True, name : str="main"):
+		if not hasattr(sqlite3.Connection, "blobopen"):
+			raise NotImplementedError("Incremental BLOB I/O requires sqlite3.Connection.blobopen (Python 3.11 or later).")
+		self.closed = True
+		self._connection = connection
+		self.readonly = readonly
+		self._blob = connection.call(lambda c:c.blobopen(table, column, rowid, readonly=readonly, name=name))
+		self.closed = False
+	
+	def __repr__(self):
+		return f"<{self.__class__.__name__} {'closed' if self.closed else f'of {len(self)} bytes'} readonly={self.readonly}>"
+
+	def __enter__(self):
+		return self
+	
+	def __exit__(self, *args):
+		self.close()
+	
+	def __del__(self):
+		try:
+			self.close()
+		except:
+			pass
+
+	def __len__(self) -> int:
+		return self._connection.call(lambda c, blob:len(blob), self._blob)
+	
+	def __getitem__(self, key : int|slice) -> int|bytes:
+		return self._connection.call(lambda c, blob, key:blob[key], self._blob, key)
+	
+	def __setitem__(self, key : int|slice, value : int|bytes):
+		self._connection.call(lambda c, blob, key, value:blob.__setitem__(key, value), self._blob, key, value)
+
+	def read(self, length : int=-1) -> bytes:
+		return self._connection.call(lambda c, blob, length:blob.read(length), self._blob, length)
+	
+	def readinto(self, buffer : "Buffer") -> int:
+		"""Reads as many bytes as fit into the given writable buffer, starting at the current position. Returns the
+		number of bytes read, which is 0 at the end of the blob."""
+		def readinto(c, blob, view):
+			data = blob.read(len(view))
+			view[:len(data)] = data
+			return len(data)
+		return self._connection.call(readinto, self._blob, memoryview(buffer).cast("B"))
+
+	def write(self, data : "Buffer"):
+		"""Writes the data at the current position. A blob can't change size, so writing past its end raises
+		ValueError."""
+		self._connection.call(lambda c, blob, data:blob.write(data), self._blob, data)
+	
+	def seek(self, offset : int, origin : int=os.SEEK_SET):
+		self._connection.call(lambda c, blob, offset, origin:blob.seek(offset, origin), self._blob, offset, origin)
+	
+	def tell(self) -> int:
+		return self._connection.call(lambda c, blob:blob.tell(), self._blob)
+
+	def chunks(self, size : int=None) -> Generator[bytes,None,None]:
+		"""Reads the rest of the blob `size` bytes at a time."""
+		while chunk := self.read(size or self.CHUNK_SIZE):
+			yield chunk
+	
+	def chunksInto(self, buffer : "Buffer") -> Generator[memoryview,None,None]:
+		"""Reads the rest of the blob into the same buffer over and over, yielding a `memoryview` of the filled part of
+		the buffer each time. The view is only valid until the next chunk is read."""
+		view = memoryview(buffer).cast("B")
+		while n := self.readinto(view):
+			yield view[:n]
+	
+	def writeFrom(self, source : "Buffer|BinaryIO|Iterable[bytes]", size : int=None) -> int:
+		"""Writes bytes-like data, the contents of a binary file object or an iterable of bytes-like chunks at the
+		current position, `size` bytes at a time. Bytes-like data is written through `memoryview` slices and file
+		objects through `readinto` into one reused buffer. Returns the number of bytes written."""
+		size = size or self.CHUNK_SIZE
+		written = 0
+		if hasattr(source, "readinto"):
+			buffer = bytearray(size)
+			view = memoryview(buffer)
+			while n := source.readinto(buffer):
+				self.write(view[:n])
+				written += n
+		elif isinstance(source, (bytes, bytearray, memoryview)):
+			view = memoryview(source).cast("B")
+			for i in range(0, len(view), size):
+				self.write(view[i:i+size])
+			written = len(view)
+		else:
+			for chunk in source:
+				self.write(chunk)
+				written += len(chunk)
+		return written
+
+	def close(self):
+		if not self.closed:
+			self.closed = True
+			self._connection.call(lambda c, blob:blob.close(), self._blob)
+
 class DatabaseMeta(type):
 	
 	columns : SQLDict[Column] = SQLDict()
@@ -164,6 +463,41 @@ class Database(metaclass=DatabaseMeta):
 	in-sql name (Index.__sql_name__). When iterated, returns dict.values() instead of the usual dict.keys()."""
 	assertions : list[Assertion] = Globals.ASSERTIONS
 	"""A look-up list of assertions and the exceptions to be raised should the assertion fail. Assertions are checked last to first."""
+	joinGraph : "JoinGraph"
+	"""Graph of which tables share columns with each other, used to plan the joins of `database[...]`."""
+	plans : LRUCache
+	"""Queries built by `database[...]`, keyed on the shape of the request. Each `Database` subclass has its own."""
+	PLAN_CACHE_SIZE : int = 1024
+	readers : int = 0
+	"""Number of reader threads to open alongside the writer thread. Can be set through the 'readers' keyword argument in
+	class creation. SELECT-statements are served by the readers while everything else goes to the writer."""
+	groupCommit : bool = False
+	"""Whether the writer thread commits queued INSERT/UPDATE/DELETE-statements from many callers in shared
+	transactions. Can be set through the 'groupCommit' keyword argument in class creation."""
+	groupCommitSize : int = 100
+	"""Largest number of statements that share one transaction when `groupCommit` is True."""
+	groupCommitDelay : float = 0.001
+	"""Longest time in seconds the writer waits for more statements to share a transaction when `groupCommit` is True."""
+	
+	mmapSize : int|None = None
+	"""Number of bytes of the file to memory-map (`PRAGMA mmap_size`), so that reads are served straight from the page
+	cache. Left as SQLite's default if None. Can be set through the 'mmapSize' keyword argument in class creation."""
+	analyzeThreshold : int|None = None
+	"""Number of changed rows after which a table is analyzed automatically by the writer thread, so that queries keep
+	being planned from up to date statistics. Never if None. Can be set through the 'analyzeThreshold' keyword argument
+	in class creation."""
+	optimizeOnClose : bool = False
+	"""Whether `PRAGMA optimize` is run when the database is closed. Can be set through the 'optimizeOnClose' keyword
+	argument in class creation."""
+	profile : str|None = None
+	"""Name of a set of PRAGMA-statements in `Globals.PRAGMA_PROFILES` to run on every connection. Can be set through the
+	'profile' keyword argument in class creation and switched at runtime with `setProfile`."""
+	pragmas : dict[str,Any] = {}
+	"""PRAGMA-statements to run on every connection, as pairs of pragma name and value. Override those of `profile`. Can
+	be set through the 'pragmas' keyword argument in class creation and changed at runtime with `setProfile`."""
+	instrument : bool = True
+	"""Whether the time spent building, queueing, executing and fetching every query is recorded. (See `stats`) Can be
+	set through the 'instrument' keyword argument in class creation."""
 	
 	@overload
 	def __init__(self, filename : str, mode : Mode, factory : type=Connection): ...
@@ -177,27 +511,78 @@ class Database(metaclass=DatabaseMeta):
 			self.factory = factory
 		match mode:
 			case "w":
-				self._connection = ThreadConnection(filename, factory=self.factory, identifier=id(self))
-			case "r":
+				self._connection = ThreadConnection(filename, factory=self.factory, identifier=id(self), readers=self.readers,
+												groupCommit=self.groupCommit, maxGroupSize=self.groupCommitSize, maxGroupDelay=self.groupCommitDelay,
+												pragmas=self.connectionPragmas(), analyzeThreshold=self.analyzeThreshold,
+												optimizeOnClose=self.optimizeOnClose, instrument=self.instrument)
+			case "r" | "ri":
 				if not os.path.exists(filename):
 					raise FileNotFoundError(f"Database file {filename} not found on the system.")
 				
 				# Convert to URI acceptable filename
-				cDatabase = "/".join(filter(*this != "", filename.replace('?', '%3f').replace('#', '%23').split(os.path.sep)))
+				cDatabase = "/".join(filter(*this != "", self.filename.replace('?', '%3f').replace('#', '%23').split(os.path.sep)))
 				if not cDatabase.startswith("/"): # Path has to be absolute already, and windows paths need a prepended '/'
 					cDatabase = "/"+cDatabase
+				# "ri" is for files that never change while open, which lets SQLite skip all locking.
+				cDatabase = f"file:{cDatabase}?mode=ro&immutable=1" if mode == "ri" else f"file:{cDatabase}?mode=ro"
 				
-				self._connection = ThreadConnection(filename, factory=self.factory, identifier=id(self))
+				self._connection = ThreadConnection(cDatabase, factory=self.factory, identifier=id(self), readers=self.readers,
+												uri=True, readonly=True, pragmas=self.connectionPragmas(), instrument=self.instrument)
 			case _:
-				raise ValueError(f"{mode!r} is not a recognized file-stream mode. Only 'w'/'r' allowed.")
+				raise ValueError(f"{mode!r} is not a recognized file-stream mode. Only 'w'/'r'/'ri' allowed.")
 	
-	def __init_subclass__(cls, *, assertions : tuple=(), **kwargs):
+	def connectionPragmas(self) -> dict[str,Any]:
+		"""All PRAGMA-statements run on every connection opened for this database, from `profile`, `mmapSize` and
+		`pragmas` in that order of precedence."""
+		pragmas = dict(Globals.PRAGMA_PROFILES[self.profile]) if self.profile else {}
+		if self.mmapSize is not None:
+			pragmas["mmap_size"] = self.mmapSize
+		pragmas.update(self.pragmas)
+		return pragmas
+	
+	def setProfile(self, profile : str|None, **pragmas : Any):
+		"""Switches the PRAGMA profile of the database, and adds or replaces any given pragmas, for example during a
+		load phase. The change applies to all worker connections before their next statement and is kept on `reopen`.
+		Pragmas that the new profile doesn't set are set back to the value they had before they were first set.
+		```python
+		database.setProfile("bulk-load", cache_size=-1048576)
+		```
+		"""
+		if profile is not None and profile not in Globals.PRAGMA_PROFILES:
+			raise ValueError(f"{profile!r} is not a known PRAGMA profile. Known profiles are: {', '.join(Globals.PRAGMA_PROFILES)}")
+		self.profile = profile
+		if pragmas:
+			self.pragmas = {**self.pragmas, **pragmas}
+		self._connection.setPragmas(self.connectionPragmas())
+	
+	def __init_subclass__(cls, *, assertions : tuple=(), readers : int=None, groupCommit : bool=None, mmapSize : int=None,
+					   profile : str=None, pragmas : dict[str,Any]=None, analyzeThreshold : int=None, optimizeOnClose : bool=None,
+					   instrument : bool=None, **kwargs):
 		super().__init_subclass__(**kwargs)
+		if instrument is not None:
+			cls.instrument = instrument
+		if analyzeThreshold is not None:
+			cls.analyzeThreshold = analyzeThreshold
+		if optimizeOnClose is not None:
+			cls.optimizeOnClose = optimizeOnClose
+		if mmapSize is not None:
+			cls.mmapSize = mmapSize
+		if profile is not None:
+			if profile not in Globals.PRAGMA_PROFILES:
+				raise ValueError(f"{profile!r} is not a known PRAGMA profile. Known profiles are: {', '.join(Globals.PRAGMA_PROFILES)}")
+			cls.profile = profile
+		if pragmas is not None:
+			cls.pragmas = {**cls.pragmas, **pragmas}
 		if assertions:
 			cls.assertions = cls.assertions + assertions
+		if readers is not None:
+			cls.readers = readers
+		if groupCommit is not None:
+			cls.groupCommit = groupCommit
 		cls.columns = SQLDict()
 		cls.tables = SQLDict()
 		cls.indexes = SQLDict()
+		cls.plans = LRUCache(cls.PLAN_CACHE_SIZE)
 		for item in map(lambda name:getattr(cls, name), tuple(dir(cls))):
 			if isRelated(item, Table):
 				cls.tables.append(item)
@@ -209,6 +594,9 @@ class Database(metaclass=DatabaseMeta):
 				if column not in cls.columns:
 					cls.columns.append(column)
 		
+		from SQLOOP._core.Functions import JoinGraph
+		cls.joinGraph = JoinGraph(cls.tables)
+		
 
 	def __enter__(self):
 		return self
@@ -222,7 +610,7 @@ class Database(metaclass=DatabaseMeta):
 	
 	def __del__(self):
 		try:
-			self.close()
+			self._connection.closeLater(identifier=id(self))
 		except:
 			pass
 	
@@ -245,20 +633,28 @@ class Database(metaclass=DatabaseMeta):
 	@final
 	def __call__(self, query : str|Query|Word|type[Word], params : list[Any]=[]) -> Generator[tuple[Any],None,None]|Any|None:
 		if isinstance(query, str):
-			if query.strip().lower().startswith("select"):
-				return (row for row in self._connection.execute(query, params))
+			if Globals.readOnlyCommand.match(query):
+				return self._connection.stream(query, params)
 			else:
 				self._connection.execute(query, params)
 				return None
 		elif isinstance(query, SQLOOP):
-			if isinstance(query, SelectStatement):
-				return Fetcher(self._connection, query)
-			else:
-				query @ self._connection
-				return None
+			return self.runQuery(query)
 		else:
 			raise ValueError(f"Trying to call database with seomthing other than a 'str' or a 'Query' object.\ndatabase({query}, {params})")
 	
+	def runQuery(self, query : Query|Word, started : float=None) -> Generator[tuple[Any],None,None]|Any|None:
+		"""Executes a query object. If `started` is given, then the time since then is recorded as the time it took to
+		build the query."""
+		stats = self._connection.stats
+		if started is not None and stats.enabled:
+			stats.record(str(query), "build", time.perf_counter() - started)
+		if isinstance(query, SelectStatement):
+			return Fetcher(self._connection, query)
+		else:
+			query @ self._connection
+			return None
+	
 	def __contains__(self, other):
 		if isinstance(other, SQLOOP):
 			if isThing(other, Column):
@@ -270,11 +666,73 @@ class Database(metaclass=DatabaseMeta):
 		return False
 
 	def __getitem__(self, items : tuple[Column|Table|Comparison]):
+		started = time.perf_counter()
+		if not type(items) is tuple:
+			items = (items, )
+		if (planned := self.planQuery(items)) is None:
+			return self.runQuery(self.createQuery(items), started)
+		plan, params = planned
+		if (stats := self._connection.stats).enabled:
+			stats.record(plan.sql, "build", time.perf_counter() - started)
+		return plan.execute(self, params)
+
+	def planQuery(self, items : tuple[Column|Table|Comparison]) -> tuple[PreparedQuery,list]|None:
+		"""The cached plan of `database[items]` together with the parameters to execute it with. Returns None if the
+		items can't be split into a shape and values. (See `getShape`)"""
+		if (shape := self.getShape(items)) is None:
+			return None
+		key, template, values = shape
+		if (cached := self.plans.get(key)) is None:
+			# The template is kept alongside the plan, since the key refers to its columns and tables by id
+			cached = self.plans[key] = (PreparedQuery(None, self.createQuery(template)), template)
+		plan, _ = cached
+		return plan, plan.bind(**values)
+
+	@staticmethod
+	def getShape(items : tuple[Column|Table|Comparison]) -> tuple[tuple,tuple,dict[str,Any]]|None:
+		"""Splits the items of `database[items]` into the shape of the request and the values it compares against.
+		Returns the key of the shape, the items with the values replaced by placeholders and the values by placeholder
+		name. Returns None if the items hold values that can't be placed in a placeholder."""
+		key = []
+		template = []
+		values = {}
+		for item in items:
+			if type(item) is Comparison and isRelated(item.left, Column):
+				right = item.right
+				if isinstance(right, SanitizedValue) and not isinstance(right, Placeholder):
+					name = f"value{len(values)}"
+					values[name] = right.params[0]
+					key.append((item.operator, id(item.left), "?"))
+					template.append(Comparison(item.left, item.operator, Placeholder(name)))
+				elif isinstance(right, SQLTuple) and all(isinstance(x, SanitizedValue) and not isinstance(x, Placeholder) for x in right):
+					names = tuple(f"value{len(values)+i}" for i in range(len(right)))
+					values.update(zip(names, map(lambda x:x.params[0], right)))
+					key.append((item.operator, id(item.left), ("?",)*len(right)))
+					template.append(Comparison(item.left, item.operator, SQLTuple(map(Placeholder, names))))
+				elif isinstance(right, type) and not getReadyAttr(right, "params", []):
+					key.append((item.operator, id(item.left), id(right)))
+					template.append(item)
+				else:
+					return None
+			elif isinstance(item, type):
+				key.append(id(item))
+				template.append(item)
+			elif not getReadyAttr(item, "params", []):
+				key.append(renderKey(item))
+				template.append(item)
+			else:
+				return None
+		return tuple(key), tuple(template), values
+
+	def createQuery(self, items : tuple[Column|Table|Comparison]) -> SelectStatement:
+		"""Builds the SELECT-statement that `database[items]` executes. The tables to select from and the joins and
+		subqueries needed to connect them are determined from the given columns, tables and comparisons. Finished
+		queries are cached in `plans` by `__getitem__`, keyed on the shape of the items rather than their values."""
 		if not type(items) is tuple:
 			items = (items, )
 		from SQLOOP._core.Functions import getSmallestFootprint, createSubqueries, recursiveWalk, disambiguateColumn
 		if Globals.MAX_DEBUG: self.LOG.debug(f"Getting: {', '.join(map(str, items))}")
-		columns = tuple(filter(lambda x:isRelated(x, Column) or isinstance(x, Aggregate) or isinstance(x, Operation), items)) or (ALL)
+		columns = tuple(filter(lambda x:isRelated(x, Column) or isinstance(x, Aggregate) or isinstance(x, Operation), items)) or (ALL, )
 
 		comps = tuple(filter(lambda x:isinstance(x, Comparison), items))
 
@@ -284,7 +742,7 @@ class Database(metaclass=DatabaseMeta):
 		if tables:
 			if Globals.MAX_DEBUG: self.LOG.debug(f"Tables given: {', '.join(map(str, tables))}")
 		else:
-			tables = getSmallestFootprint(frozenset(self.tables), realColumns, secondaryColumns=frozenset(map(*this.left, comps)))
+			tables = getSmallestFootprint(self.joinGraph, realColumns, secondaryColumns=frozenset(map(*this.left, comps)))
 			if Globals.MAX_DEBUG: self.LOG.debug(f"Tables Determined: {', '.join(map(str, tables))}")
 
 		# Disambiguate columns. I.e. Use 'table.column' instead of just 'column' when more than one table has a column named 'column'
@@ -299,7 +757,7 @@ class Database(metaclass=DatabaseMeta):
 
 		distant, local = binner(lambda x:x.left in joinedColumns, comps, default=2)
 		if distant:
-			wheres = connections + local + createSubqueries(SQLDict(tables), self.tables, distant)
+			wheres = connections + local + createSubqueries(tables, self.joinGraph, distant)
 		else:
 			wheres = connections + local
 		
@@ -310,7 +768,7 @@ class Database(metaclass=DatabaseMeta):
 			query = query - WHERE (*wheres)
 		if order:
 			query = query - ORDER - BY (*order)
-		return self(query)
+		return query
 
 	@property
 	def __version__(self):
@@ -393,6 +851,180 @@ class Database(metaclass=DatabaseMeta):
 			self.LOG.exception(e, stacklevel=logging.DEBUG)
 			return False
 
+	@contextmanager
+	def bulkLoad(self, profile : str="bulk-load", analyze : bool=True):
+		"""Runs everything inside the `with`-block as one transaction, with the declared `indexes` dropped and the given
+		PRAGMA profile in use, so that indexes are built once at the end instead of updated row by row. On success, the
+		transaction is committed, all indexes are rebuilt and, if `analyze` is True, `ANALYZE` is run. On error,
+		everything (Including the dropped indexes) is rolled back. The previous profile is restored either way, and pragmas
+		that it doesn't set get back the values they had before the bulk load.
+		```python
+		with database.bulkLoad():
+			database.insertMany(MyTable, rows)
+		```
+		"""
+		if self._connection.inTransaction:
+			raise sqlite3.OperationalError("Cannot start a bulk load within a transaction.")
+		previous = self.profile, self.pragmas
+		self.setProfile(profile)
+		try:
+			self(BEGIN - TRANSACTION)
+			try:
+				for index in self.indexes:
+					self(DROP - INDEX - IF - EXISTS(Hardcoded(str(index))))
+				yield self
+			except:
+				self(ROLLBACK)
+				raise
+			self(COMMIT)
+		finally:
+			self.profile, self.pragmas = previous
+			self._connection.setPragmas(self.connectionPragmas())
+		for index in self.indexes:
+			self.createIndex(index)
+		if analyze:
+			self.analyze()
+
+	def analyze(self, *tables : Table):
+		"""Runs ANALYZE on the given tables, or on the whole database if none are given, so that SQLite plans queries
+		from up to date statistics (`sqlite_stat1`). When each table was last analyzed is kept in `lastAnalyzed`."""
+		names = [str(table) for table in tables] if tables else None
+		connection = self._connection
+		connection.call(lambda c, names:connection.analyzeTables(c, names), names)
+	
+	@property
+	def lastAnalyzed(self) -> dict[str,float]:
+		"""Time (As given by `time.time`) when each table was last analyzed through this connection, keyed by table
+		name."""
+		return dict(self._connection.lastAnalyzed)
+
+	def insertMany(self, table : Table, rows : Iterable[tuple], batchSize : int=1000, columns : tuple[Column]=None) -> int:
+		"""Inserts all rows into the table using a single parameterized `INSERT`-statement. Each row must hold one value
+		per column in `columns`, which defaults to all columns of the table in order. Rows are inserted in transactions
+		of `batchSize` rows. Returns the number of inserted rows."""
+		columns = columns or tuple(table.columns)
+		query = INSERT - INTO - table - SQLTuple(Hardcoded(col.__sql_name__) for col in columns) - VALUES (*(Hardcoded("?") for _ in columns))
+		return self._connection.bulk(str(query), rows, batchSize=batchSize)
+
+	def openBlob(self, column : Column, rowid : int, readonly : bool=True) -> Blob:
+		"""Opens the BLOB value of a column in the row with the given rowid for incremental reading, or writing if
+		`readonly` is False. See `Blob`."""
+		return Blob(self._connection, *self.blobTarget(column), rowid, readonly=readonly)
+	
+	def blobTarget(self, column : Column) -> tuple[str,str]:
+		"""The names of the table and column that a BLOB column refers to. The table is the one the column was
+		accessed through (`Table.Column`), or otherwise the only table of the database that has the column."""
+		table = getattr(column, "table", None)
+		if table is None:
+			tables = [t for t in self.tables if column in t]
+			if len(tables) != 1:
+				raise ColumnNotFoundError(f"{column!r} is not in exactly one table of {self!r}, access it through its table instead. Found in: {tables}")
+			table = tables[0]
+		name = column.fullName if isRelated(column, ColumnAlias) else column.__sql_name__
+		return table.__sql_name__, name
+	
+	def writeBlob(self, column : Column, rowid : int, source : "Buffer|BinaryIO|Iterable[bytes]", size : int=None) -> int:
+		"""Replaces the BLOB value of a column in the row with the given rowid by streaming `source` into it. `source`
+		may be bytes-like data, a binary file object or an iterable of bytes-like chunks. The value is first set to a
+		`zeroblob` of the final size, which has to be given as `size` unless it can be determined from `source`. Like
+		other statements, the change is committed with `commit`. Returns the number of bytes written."""
+		if size is None:
+			if isinstance(source, (bytes, bytearray, memoryview)):
+				size = memoryview(source).nbytes
+			elif hasattr(source, "seek") and hasattr(source, "tell"):
+				start = source.tell()
+				size = source.seek(0, os.SEEK_END) - start
+				source.seek(start)
+			else:
+				raise ValueError("The size of the blob must be given when writing from an iterable of chunks.")
+		table, name = self.blobTarget(column)
+		self(f"UPDATE {table} SET {name} = zeroblob(?) WHERE rowid = ?", [size, rowid])
+		with self.openBlob(column, rowid, readonly=False) as blob:
+			return blob.writeFrom(source)
+
+	def fetchColumns(self, query : Query|Column|Table|Comparison, *items : Column|Table|Comparison, dtypes : dict[str,Any]=None, fixedWidth : bool=False) -> dict[str,"numpy.ndarray"]:
+		"""Fetches the results of a SELECT-statement, or of the same items as given to `database[...]`, as one NumPy
+		array per column. See `Fetcher.toArrays`."""
+		if not isinstance(query, Query) or items:
+			query = self.createQuery((query, *items))
+		return Fetcher(self._connection, query, singlet=False).toArrays(dtypes, fixedWidth)
+
+	def stats(self) -> dict[str,Any]:
+		"""Counts, totals and percentiles (p50/p95/p99) of the time spent in every phase of every kind of query run on
+		the database since the last `resetStats`, together with how deep the queues have been and how busy the worker
+		threads are. Queries are keyed by their fingerprint, so queries that only differ in their values are counted
+		together.
+		```python
+		for sql, phases in database.stats()["queries"].items():
+			print(sql, phases["execute"]["p99"])
+		```
+		"""
+		return self._connection.stats.snapshot()
+	
+	def resetStats(self):
+		self._connection.stats.reset()
+	
+	def logSlowQueries(self, threshold : float|None=0.1, sampleRate : float=0.0, filename : str=None, *, redact : bool|Callable=False,
+					explain : bool=True, maxBytes : int=10<<20, backupCount : int=5) -> SlowQueryLog|None:
+		"""Starts logging every query that takes longer than `threshold` seconds to execute and fetch, and a random
+		`sampleRate` fraction of all other queries, together with their `EXPLAIN QUERY PLAN`. Records are logged through
+		`Globals.LOGGER` (As 'SQLOOP.SlowQueries.<class name>') and written as JSON-lines to `filename`, if given, which
+		is rotated when it grows past `maxBytes`. Parameters are replaced with '?' in the records if `redact` is True.
+		Stops logging if `threshold` is None and `sampleRate` is 0. (See `SlowQueryLog`)
+		```python
+		database.logSlowQueries(0.05, filename="slow.jsonl", redact=True)
+		```
+		"""
+		if (previous := self._connection.slowQueries) is not None:
+			previous.close()
+		if threshold is None and not sampleRate:
+			log = None
+		else:
+			log = SlowQueryLog(threshold, sampleRate, filename=filename, redact=redact, explain=explain, maxBytes=maxBytes,
+					  backupCount=backupCount, logger=f"SlowQueries.{type(self).__name__}")
+		self._connection.setSlowQueryLog(log)
+		return log
+	
+	def adviseIndexes(self, minRows : int|None=1000, autoCreate : bool=False) -> IndexAdvisor|None:
+		"""Starts an `IndexAdvisor`, which explains every distinct query run on the database to find the tables of at
+		least `minRows` rows that are scanned. The indexes it proposes are given by `indexAdvice`, and created by it if
+		`autoCreate` is True. Stops the advisor if `minRows` is None."""
+		advisor = None if minRows is None else IndexAdvisor(minRows, autoCreate)
+		self._connection.setIndexAdvisor(advisor)
+		return advisor
+	
+	def indexAdvice(self) -> list[IndexProposal]:
+		"""Indexes proposed by the running `IndexAdvisor`, ranked by the time spent on the queries they would speed up.
+		If the advisor was started with `autoCreate`, then the proposed indexes are also created through `createIndex`.
+		```python
+		database.adviseIndexes()
+		...
+		for proposal in database.indexAdvice():
+			print(f"# {proposal.cost:.2f} s spent on {proposal.count} queries")
+			print(proposal)
+		```
+		"""
+		if (advisor := self._connection.advisor) is None:
+			raise ValueError(f"No index advisor is running for {type(self).__name__!r}. Start one with `adviseIndexes`.")
+		proposals = advisor.proposals(self)
+		if advisor.autoCreate and proposals:
+			for proposal in proposals:
+				proposal.created = self.createIndex(proposal.index)
+			advisor.forget()
+		return proposals
+
+	def prepare(self, query : Query|Column|Table|Comparison, *items : Column|Table|Comparison) -> PreparedQuery:
+		"""Compiles a query containing `Placeholder` values into a `PreparedQuery`. Either a whole query or the same
+		items as given to `database[...]` can be prepared.
+		```python
+		lookup = database.prepare(Name, MyTable, ID == Placeholder("id"))
+		lookup(id=1)
+		```
+		"""
+		if not isinstance(query, Query) or items:
+			query = self.createQuery((query, *items))
+		return PreparedQuery(self, query)
+
 	def commit(self):
 		self._connection.commit()
 
@@ -10,17 +10,20 @@ class Expression(Query):
 	startWords : set[type[Word]]
 	startWord : type[Word]
 
+	__slots__ = ()
+
 	def __init__(self, startWord, *words: tuple[Word], sep: str = None):
 		super().__init__(startWord, *words, sep=sep)
-		self.startWord = type(self.words[0]) if isinstance(self.words[0], Word) else self.words[0]
+	
+	@property
+	def startWord(self):
+		return type(self.words[0]) if isinstance(self.words[0], Word) else self.words[0]
 	
 	def __init_subclass__(cls, *args, name: str | None = None, **kwargs) -> None:
 		super().__init_subclass__(*args, name=name, **kwargs)
 		for word in cls.startWords:
 			word.startWord = word
-			words = cached_property(lambda self:SQLTuple([self]))
-			words.__set_name__(word, "words")
-			word.words = words
+			word.words = property(lambda self:SQLTuple([self]))
 			for attrName, value in vars(cls).items():
 				if not hasattr(word, attrName):
 					setattr(word, attrName, value)
@@ -31,6 +34,8 @@ class SelectStatement(Expression):
 	startWords = {SELECT}
 	startWord = SELECT
 
+	__slots__ = ()
+
 	def __init__(self, startWord, *words: tuple[Word], sep: str = None):
 		super().__init__(startWord, *words, sep=sep)
 		if self.words and self.words[0] is SELECT:
@@ -134,7 +139,7 @@ class SelectStatement(Expression):
 				break
 		else:
 			return True
-		conditionalColumns = set(map(*this.left, filter(lambda x:isRelated(x.left, Column) and x.operator != "IN" and isinstance(x.right, SanitizedValue), self.wheres)))
+		conditionalColumns = set(map(*this.left, filter(lambda x:isRelated(x.left, Column) and x.operator in ("==", "=", "IS") and isinstance(x.right, SanitizedValue), self.wheres)))
 		for constraint in self.constraints:
 			if not constraint.unique:
 				continue
@@ -157,6 +162,8 @@ class TableConstraint(Expression):
 
 	startWords = {CONSTRAINT, PRIMARY, UNIQUE, CHECK, FOREIGN, NOT}
 
+	__slots__ = ()
+
 	def __init__(self, *words : tuple[Word], sep : str=" "):
 		super().__init__(*words, sep=sep)
 	
@@ -206,29 +206,128 @@ def correctDatabase(cls, filepath):
 def verifyDatabase(cls, filepath):
 	return cls(filepath, "r").valid
 
-@cache
-def getSmallestFootprint(tables : set["Table"], columns : set["Column"], secondaryColumns : set["Column"]=None) -> tuple["Table"]|None:
+class JoinGraph:
+	"""Graph of the tables of a database, in which two tables are neighbours if they have a column in common. Built once
+	for every `Database` subclass, and used to plan which tables a query has to select from and how to subquery tables
+	that aren't selected from."""
+
+	tables : tuple["Table"]
+	neighbours : dict["Table",tuple["Table"]]
+	distances : dict["Table",dict["Table",int]]
+	"""Number of joins needed to get from one table to another. Tables that can't be reached are left out."""
+	paths : dict[tuple["Table","Table"],tuple["Table"]]
+	"""Shortest join path between every pair of connected tables, including both ends."""
+	joinColumns : dict[tuple["Table","Table"],tuple["Column"]]
+	"""Columns that neighbouring tables have in common, in the column order of the first table."""
+
+	def __init__(self, tables : Iterable["Table"]):
+		self.tables = tuple(tables)
+		self.joinColumns = {}
+		for table in self.tables:
+			for other in self.tables:
+				if other is not table and not table.columns.isdisjoint(other.columns):
+					self.joinColumns[table, other] = tuple(col for col in table.columns if col in other.columns)
+		self.neighbours = {table:tuple(other for other in self.tables if (table, other) in self.joinColumns) for table in self.tables}
+		self.distances = {}
+		self.paths = {}
+		for table in self.tables:
+			distances, previous = self.search((table, ))
+			self.distances[table] = distances
+			for target in distances:
+				path = [target]
+				while path[-1] is not table:
+					path.append(previous[path[-1]])
+				self.paths[table, target] = tuple(reversed(path))
 	
+	def __repr__(self):
+		edges = "".join(f"\n\t{table} -> {', '.join(map(str, self.neighbours[table]))}" for table in self.tables)
+		return f"<{self.__class__.__name__} at 0x{id(self):0>16X}{edges}\n>"
+
+	def describe(self) -> str:
+		"""Lists the precomputed join path between every pair of connected tables, with the column each join is made
+		on. Meant for debugging how queries get planned."""
+		lines = []
+		for (start, end), path in self.paths.items():
+			if start is not end:
+				steps = "".join(f" -[{self.joinColumns[a, b][0]}]-> {b}" for a, b in zip(path, path[1:]))
+				lines.append(f"{start}{steps}")
+		return "\n".join(lines)
+
+	def path(self, start : "Table", end : "Table") -> tuple["Table"]|None:
+		return self.paths.get((start, end))
+
+	def joinColumn(self, table : "Table", other : "Table") -> "Column":
+		return self.joinColumns[table, other][0]
+
+	def __contains__(self, table):
+		return table in self.neighbours
+	
+	def search(self, starts : Iterable["Table"]) -> tuple[dict["Table",int],dict["Table","Table"]]:
+		"""Breadth-first search from all of the given tables at once. Returns the distance to every reachable table and
+		the table through which each table was first reached."""
+		distances = {table:0 for table in starts}
+		previous = {}
+		frontier = list(distances)
+		while frontier:
+			nextFrontier = []
+			for table in frontier:
+				for neighbour in self.neighbours.get(table, ()):
+					if neighbour not in distances:
+						distances[neighbour] = distances[table] + 1
+						previous[neighbour] = table
+						nextFrontier.append(neighbour)
+			frontier = nextFrontier
+		return distances, previous
+
+	def distance(self, tables : Iterable["Table"], table : "Table") -> int|float:
+		return min((self.distances.get(start, {}).get(table, float("inf")) for start in tables), default=0)
+
+	def connect(self, tables : Iterable["Table"]) -> tuple["Table"]:
+		"""Approximates the smallest connected set of tables that contains all of the given tables (A Steiner tree in
+		the join graph), by repeatedly joining in the closest of the remaining tables along a shortest path. Tables that
+		can't be reached are added as they are."""
+		tables = tuple(dict.fromkeys(tables))
+		if len(tables) < 2:
+			return tables
+		tree = [tables[0]]
+		remaining = list(tables[1:])
+		while remaining:
+			distances, previous = self.search(tree)
+			target = min(remaining, key=lambda t:distances.get(t, float("inf")))
+			remaining.remove(target)
+			if target not in distances:
+				tree.append(target)
+				continue
+			path = []
+			while target not in tree:
+				path.append(target)
+				target = previous[target]
+			tree.extend(reversed(path))
+			remaining = [t for t in remaining if t not in tree]
+		return tuple(sorted(tree, key=lambda t:tables.index(t) if t in tables else len(tables)))
+
+def getSmallestFootprint(tables : JoinGraph|Iterable["Table"], columns : set["Column"], secondaryColumns : set["Column"]=None) -> tuple["Table"]:
+	"""Picks a small, connected set of tables that together have all of the given columns. Tables are picked greedily
+	by how many of the missing columns they have, then by how many of the `secondaryColumns` they have and then by how
+	close they are to the already picked tables. Finally, the tables needed to join the picked tables together are
+	added."""
 	LOG = LOGGER.getChild("getSmallestFootprint")
-	LOG.debug(f"Called with signature: ({tables=}, {columns=}, {secondaryColumns=})")
-	mustHaves = set(filter(None, map(*this.table, columns)))
-	candidates = []
-	for i in range(len(tables)):
-		for subTables in filter(mustHaves.issubset, itertools.combinations(tuple(tables), i+1)):
-			for col in columns:
-				if not any(col in t for t in subTables):
-					break
-			else:
-				candidates.append(subTables)
-		if candidates:
+	if Globals.MAX_DEBUG: LOG.debug(f"Called with signature: ({tables=}, {columns=}, {secondaryColumns=})")
+	graph = tables if isinstance(tables, JoinGraph) else JoinGraph(tables)
+	secondaryColumns = secondaryColumns or ()
+	chosen = list(dict.fromkeys(filter(None, map(*this.table, columns))))
+	uncovered = [col for col in columns if not any(col in t for t in chosen)]
+	while uncovered:
+		candidates = [t for t in graph.tables if t not in chosen and any(col in t for col in uncovered)]
+		if not candidates:
 			break
-	LOG.debug(f"Candidates: {candidates}")
-	if secondaryColumns is not None:
-		ret = max(candidates, key=lambda candTables:sum(any(c in t for t in candTables) for c in secondaryColumns))
-	else:
-		ret = next(iter(candidates)) if candidates else ()
-	
-	LOG.debug(f"Returned {ret}")
+		chosen.append(max(candidates, key=lambda t:(
+			sum(col in t for col in uncovered),
+			sum(col in t for col in secondaryColumns),
+			-graph.distance(chosen, t))))
+		uncovered = [col for col in uncovered if col not in chosen[-1]]
+	ret = graph.connect(chosen)
+	if Globals.MAX_DEBUG: LOG.debug(f"Returned {ret}")
 	return ret
 
 def disambiguateColumn(column, tables):
@@ -269,7 +368,7 @@ def disambiguateColumn(column, tables):
 		return column
 			
 
-def recursiveSubquery(startCol : "Column", tables : SQLDict["Table"], values : list[Union["Comparison", "Query"]]) -> "Comparison":
+def recursiveSubquery(startCol : "Column", tables : SQLDict["Table"], values : list[Union["Comparison", "Query"]], graph : JoinGraph=None) -> "Comparison":
 	from SQLOOP._core.Words import IN, SELECT, FROM, WHERE
 	LOG = LOGGER.getChild("recursiveSubquery")
 	if Globals.MAX_DEBUG: LOG.debug(f"Called with signature: ({startCol=}, {tables=}, {values=})")
@@ -278,58 +377,45 @@ def recursiveSubquery(startCol : "Column", tables : SQLDict["Table"], values : l
 	elif len(tables) == 1:
 		return startCol - IN (SELECT (startCol) - FROM (tables[0]) - WHERE (*values))
 	else:
-		commonColumn = tables[0].columns.intersection(tables[1].columns)[0]
-		return startCol - IN (SELECT (startCol) - FROM (tables[0]) - WHERE (recursiveSubquery(commonColumn, tables[1:], values)))
+		if graph is not None:
+			commonColumn = graph.joinColumn(tables[0], tables[1])
+		else:
+			commonColumn = tables[0].columns.intersection(tables[1].columns)[0]
+		return startCol - IN (SELECT (startCol) - FROM (tables[0]) - WHERE (recursiveSubquery(commonColumn, tables[1:], values, graph)))
 
 
-def subqueryPaths(startTables : SQLDict["Table"], columns : SQLDict["Column"], allTables : SQLDict["Table"]) -> list[list[list["Table"], SQLDict["Column"]]]:
+def subqueryPaths(startTables : Iterable["Table"], columns : SQLDict["Column"], allTables : JoinGraph|SQLDict["Table"]) -> tuple[tuple[tuple["Table"], SQLDict["Column"]]]:
+	"""Finds, for every column, the closest table outside of `startTables` that has it, and the precomputed shortest
+	join path to it from one of the `startTables`. Columns that are reached through the same path are grouped together.
+	Columns that can't be reached are left out."""
 	LOG = LOGGER.getChild("subqueryPaths")
 	if Globals.MAX_DEBUG: LOG.debug(f"Called with signature: ({startTables=}, {columns=}, {allTables=})")
-	if not columns:
-		return []
-	visited : set[Table] = set(startTables)
-	paths : list[list[Table]] = [(t,) for t in startTables]
-	while paths:
-		if Globals.MAX_DEBUG: LOG.debug(f"Generation: {paths=}")
-		nPaths = []
-		for p in paths:
-			for t in allTables:
-				if t in visited:
-					continue
-				if p[-1].columns.isdisjoint(t.columns):
-					continue
-				if any(not t2.columns.isdisjoint(t.columns) for t2 in p[:-1]):
-					continue
-				nPaths.append((*p, t))
-				visited.add(t)
-		if Globals.MAX_DEBUG: LOG.debug(f"New Generation: {nPaths=}")
-		best, hits = max(map(lambda x:(x, columns.intersection(x[-1].columns)), nPaths), key=lambda x:len(x[1]))
-		if len(hits) == len(columns):
-			return ((best, hits),)
-		elif len(hits) > 0:
-			return ((best, hits),) + subqueryPaths(startTables.without(best), columns.without(hits), allTables.without(best))
-		else:
-			paths = nPaths
-	return ()
+	graph = allTables if isinstance(allTables, JoinGraph) else JoinGraph(allTables)
+	startTables = tuple(startTables)
+	paths : dict[tuple["Table"],list["Column"]] = {}
+	for col in columns:
+		candidates = [graph.paths[start, t] for t in graph.tables if col in t and t not in startTables for start in startTables if (start, t) in graph.paths]
+		if not candidates:
+			continue
+		best = min(candidates, key=lambda path:(len(path), path not in paths))
+		paths.setdefault(best, []).append(col)
+	ret = tuple((path, SQLDict(cols)) for path, cols in paths.items())
+	if Globals.MAX_DEBUG: LOG.debug(f"Returned {ret}")
+	return ret
 
-def createSubqueries(startTables : SQLDict["Table"], allTables : SQLDict["Table"], values : tuple["Comparison"]):
+def createSubqueries(startTables : Iterable["Table"], allTables : JoinGraph|SQLDict["Table"], values : tuple["Comparison"]):
 	LOG = LOGGER.getChild("createSubqueries")
 	if Globals.MAX_DEBUG: LOG.debug(f"Called with signature: ({startTables=}, {allTables=}, {values=})")
-	_allTables = allTables.difference(startTables)
-	paths = subqueryPaths(startTables, SQLDict(map(lambda x:x.left, values)), _allTables)
-	subqueries = {}
-	for path, targetColumns in reversed(paths):
-		subValues = []
-		for comp in values:
-			if comp.left in targetColumns:
-				subValues.append(comp)
-		
-		if path[-1] in subqueries:
-			subValues.append(subqueries.pop(path[-1]))
-		subqueries[path[0]] = recursiveSubquery(path[0].columns.intersection(path[1].columns)[0], path[1:], subValues)
-		if subqueries[path[0]] is None:
-			raise ImpossiblePathing(tables=startTables, columns=f"({', '.join(map(lambda x:str(x.left), values))})")
-	return tuple(subqueries.values())
+	graph = allTables if isinstance(allTables, JoinGraph) else JoinGraph(allTables)
+	columns = SQLDict(map(lambda x:x.left, values))
+	paths = subqueryPaths(startTables, columns, graph)
+	if sum(len(cols) for _, cols in paths) < len(columns):
+		raise ImpossiblePathing(tables=startTables, columns=f"({', '.join(map(lambda x:str(x.left), values))})")
+	subqueries = []
+	for path, targetColumns in paths:
+		subValues = [comp for comp in values if comp.left in targetColumns]
+		subqueries.append(recursiveSubquery(graph.joinColumn(path[0], path[1]), path[1:], subValues, graph))
+	return tuple(subqueries)
 
 try:
 	from SQLOOP._core.Structures import Column, Table, Query, Comparison
@@ -0,0 +1,236 @@
+
+from SQLOOP.Globals import *
+import SQLOOP.Globals as Globals
+from functools import lru_cache
+import math, time, json, logging.handlers
+
+literalPattern = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+listPattern = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql : str) -> str:
+	"""Normalizes an SQL-statement into the shape shared by all statements that only differ in their values. Literals
+	become `?`, lists of parameters become `(?+)` and whitespace is collapsed."""
+	sql = literalPattern.sub("?", sql)
+	sql = listPattern.sub("(?+)", sql)
+	return whitespacePattern.sub(" ", sql).strip().rstrip(";")
+
+class Histogram:
+	"""Histogram of durations in logarithmically sized buckets, each `GROWTH` times wider than the one before, so that
+	percentiles are known to within a few percent no matter the scale while using little memory."""
+
+	GROWTH : float = 2 ** 0.25
+	SMALLEST : float = 1e-7
+	"""Durations shorter than this (in seconds) all fall in the first bucket."""
+
+	buckets : dict[int,int]
+	count : int
+	total : float
+	max : float
+
+	def __init__(self):
+		self.buckets = {}
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} count={self.count} p50={self.percentile(50):.3g} p99={self.percentile(99):.3g}>"
+
+	def add(self, seconds : float):
+		i = 0 if seconds <= self.SMALLEST else int(math.log(seconds / self.SMALLEST, self.GROWTH))
+		self.buckets[i] = self.buckets.get(i, 0) + 1
+		self.count += 1
+		self.total += seconds
+		if seconds > self.max:
+			self.max = seconds
+
+	def percentile(self, q : float) -> float:
+		"""The upper bound of the bucket in which the q:th percentile falls, capped at the largest recorded value."""
+		if not self.count:
+			return 0.0
+		rank = q / 100 * self.count
+		seen = 0
+		for i in sorted(self.buckets):
+			seen += self.buckets[i]
+			if seen >= rank:
+				return min(self.SMALLEST * self.GROWTH ** (i + 1), self.max)
+		return self.max
+
+	def summary(self) -> dict[str,float]:
+		return {
+			"count" : self.count,
+			"total" : self.total,
+			"mean" : self.total / self.count if self.count else 0.0,
+			"p50" : self.percentile(50),
+			"p95" : self.percentile(95),
+			"p99" : self.percentile(99),
+			"max" : self.max
+		}
+
+class QueryStats:
+	"""Timings of every phase of the statements run through a connection, keyed by the fingerprint of the statement
+	(See `fingerprint`), and gauges of how deep the queues are and how busy the worker threads are. The phases are:
+	- build: Planning and building the query of `database[...]` and rendering its SQL. Queries given to `database(...)`
+	  are built by the caller, so no build time is recorded for them.
+	- wait: Time spent in the queue before a worker thread picked the statement up.
+	- execute: Running the statement in SQLite, up until the first row is available.
+	- fetch: Fetching the rows from SQLite into Python objects."""
+
+	PHASES = ("build", "wait", "execute", "fetch")
+
+	enabled : bool
+	lock : Lock
+	queries : dict[str,dict[str,Histogram]]
+	since : float
+	queueDepth : int
+	maxQueueDepth : int
+	busyWorkers : int
+	busyTime : float
+
+	def __init__(self, enabled : bool=True):
+		self.enabled = enabled
+		self.lock = Lock()
+		self.reset()
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} queries={len(self.queries)} enabled={self.enabled}>"
+
+	def reset(self):
+		with self.lock:
+			self.queries = {}
+			self.since = time.perf_counter()
+			self.queueDepth = 0
+			self.maxQueueDepth = 0
+			self.busyTime = 0.0
+			self.busyWorkers = getattr(self, "busyWorkers", 0)
+
+	def record(self, sql : str, phase : str, seconds : float):
+		key = fingerprint(sql)
+		with self.lock:
+			if (phases := self.queries.get(key)) is None:
+				phases = self.queries[key] = {}
+			if (histogram := phases.get(phase)) is None:
+				histogram = phases[phase] = Histogram()
+			histogram.add(seconds)
+
+	def enqueued(self, depth : int):
+		self.queueDepth = depth
+		if depth > self.maxQueueDepth:
+			self.maxQueueDepth = depth
+
+	def busy(self):
+		with self.lock:
+			self.busyWorkers += 1
+
+	def idle(self, seconds : float):
+		with self.lock:
+			self.busyWorkers -= 1
+			self.busyTime += seconds
+
+	def snapshot(self) -> dict[str,Any]:
+		with self.lock:
+			elapsed = time.perf_counter() - self.since
+			return {
+				"queries" : {key:{phase:phases[phase].summary() for phase in self.PHASES if phase in phases} for key, phases in self.queries.items()},
+				"queueDepth" : {"current" : self.queueDepth, "max" : self.maxQueueDepth},
+				"busy" : {"workers" : self.busyWorkers, "seconds" : self.busyTime, "ratio" : self.busyTime / elapsed if elapsed else 0.0},
+				"elapsed" : elapsed
+			}
+
+class JSONLinesFormatter(logging.Formatter):
+	"""Formats log records that carry a `query` attribute as one JSON-object per line."""
+
+	def format(self, record : logging.LogRecord) -> str:
+		entry = {"time" : record.created, "level" : record.levelname, "logger" : record.name}
+		entry.update(getattr(record, "query", {"message" : record.getMessage()}))
+		return json.dumps(entry, default=repr)
+
+class SlowQueryLog:
+	"""Logs every statement whose execution and fetching together takes longer than `threshold` seconds, and a random
+	`sampleRate` fraction of all other statements. Each record holds the SQL, its parameters, the time spent in each
+	phase and the output of `EXPLAIN QUERY PLAN` for the statement, captured on the same worker connection that ran it.
+	
+	Records are logged through `logger`, a child of `Globals.LOGGER`, and written as JSON-lines to `filename` (If
+	given) which is rotated once it grows past `maxBytes`. If `redact` is True, then parameters are replaced with
+	'?', and if it is a function, then the parameters are replaced with what it returns when given them."""
+
+	threshold : float|None
+	sampleRate : float
+	redact : bool|Callable[[list],list]
+	explain : bool
+	"""Whether `EXPLAIN QUERY PLAN` is captured for the logged statements."""
+	logger : logging.Logger
+	handler : logging.Handler|None
+	"""The file handler opened by this log, if any. A log given the same file as an earlier log writes through the
+	handler of the earlier one."""
+
+	def __init__(self, threshold : float|None=0.1, sampleRate : float=0.0, *, filename : str=None, redact : bool|Callable=False,
+			  explain : bool=True, maxBytes : int=10<<20, backupCount : int=5, logger : logging.Logger|str="SlowQueries"):
+		self.threshold = threshold
+		self.sampleRate = sampleRate
+		self.redact = redact
+		self.explain = explain
+		self.logger = logger if isinstance(logger, logging.Logger) else Globals.LOGGER.getChild(logger)
+		self.handler = None
+		if filename is not None:
+			filename = os.path.realpath(filename)
+			for handler in self.logger.handlers:
+				if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.baseFilename == filename:
+					break
+			else:
+				self.handler = logging.handlers.RotatingFileHandler(filename, maxBytes=maxBytes, backupCount=backupCount, encoding="utf-8")
+				self.handler.setFormatter(JSONLinesFormatter())
+				self.logger.addHandler(self.handler)
+			if self.logger.getEffectiveLevel() > logging.WARNING:
+				self.logger.setLevel(logging.WARNING)
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} threshold={self.threshold} sampleRate={self.sampleRate} logger={self.logger.name!r}>"
+
+	def check(self, _connection : sqlite3.Connection, sql : str, params : list, wait : float, execute : float, fetch : float):
+		"""Called by the worker thread after serving a statement. Logs it if it was slow or is sampled."""
+		try:
+			self.log(_connection, sql, params, wait, execute, fetch)
+		except Exception as e:
+			self.logger.exception(e)
+
+	def log(self, _connection : sqlite3.Connection, sql : str, params : list, wait : float, execute : float, fetch : float):
+		seconds = execute + fetch
+		if self.threshold is not None and seconds >= self.threshold:
+			sampled = False
+		elif self.sampleRate and random.random() < self.sampleRate:
+			sampled = True
+		else:
+			return
+		
+		plan = None
+		if self.explain:
+			try:
+				plan = [{"id" : id, "parent" : parent, "detail" : detail} for id, parent, _, detail in _connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+			except Exception as e:
+				plan = f"{type(e).__name__}: {e}"
+		
+		if self.redact is True:
+			params = ["?"] * len(params)
+		elif self.redact:
+			params = self.redact(params)
+		
+		self.logger.warning(f"{'Sampled' if sampled else 'Slow'} query ({seconds * 1000:.1f} ms): {sql}", extra={"query" : {
+			"sql" : sql,
+			"fingerprint" : fingerprint(sql),
+			"params" : list(params),
+			"wait" : wait,
+			"execute" : execute,
+			"fetch" : fetch,
+			"total" : wait + seconds,
+			"sampled" : sampled,
+			"plan" : plan
+		}})
+
+	def close(self):
+		"""Detaches and closes the file handler, if this log opened one."""
+		if self.handler is not None:
+			self.logger.removeHandler(self.handler)
+			self.handler.close()
+			self.handler = None
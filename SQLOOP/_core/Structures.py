@@ -1,6 +1,7 @@
 
 from SQLOOP.Globals import *
 from SQLOOP.Globals import Any
+from typing import Hashable
 from SQLOOP._core.Types import *
 
 class SQLStructure(SQLOOP, type):
@@ -15,6 +16,9 @@ class SQLStructure(SQLOOP, type):
 		return hash(self.__sql_name__)
 
 class SQLObject(SQLOOP, metaclass=SQLStructure):
+
+	__slots__ = ()
+
 	def __hash__(self):
 		from SQLOOP._core.Functions import forceHash
 		return hash(self.__sql_name__)+forceHash(vars(self).items())
@@ -23,10 +27,14 @@ class Hardcoded(SQLOOP):
 
 	value : Any
 
+	__slots__ = ("value",)
+
 	def __init__(self, value) -> None:
 		self.value = value
-		if hasattr(value, "__doc__"):
-			self.__doc__ = value.__doc__
+	
+	@property
+	def __doc__(self):
+		return getattr(self.value, "__doc__", None)
 	
 	def __str__(self):
 		return str(self.value)
@@ -38,6 +46,8 @@ class Hardcoded(SQLOOP):
 		return Query(left, self)
 
 class Operable(SQLOOP):
+
+	__slots__ = ()
 	
 	"""Math-Operations"""
 
@@ -169,6 +179,9 @@ class SanitizedValue(SQLObject, metaclass=SQLStructure):
 	
 	__sql_name__ : str = "SanitizedValue"
 	value : Any
+
+	__slots__ = ("value",)
+
 	@overload
 	def __new__(cls, value : None|SQLOOP) -> SQLOOP: ...
 	@overload
@@ -184,6 +197,9 @@ class SanitizedValue(SQLObject, metaclass=SQLStructure):
 
 	def __init__(self, value : Any):
 		self.value = value
+	def __hash__(self):
+		from SQLOOP._core.Functions import forceHash
+		return hash(self.__sql_name__)+forceHash(self.value)
 	def __str__(self):
 		return "?" if self.value is not None else "null"
 	def __sql__(self):
@@ -192,9 +208,29 @@ class SanitizedValue(SQLObject, metaclass=SQLStructure):
 	@property
 	def params(self):
 		if self.value is not None:
-			return [self.value if not isinstance(self.value, list) else tuple(self.value)]# if type(self.value) is not str else [repr(self.value)]
+			return (self.value if not isinstance(self.value, list) else tuple(self.value), )# if type(self.value) is not str else [repr(self.value)]
 		else:
-			return []
+			return ()
+
+class Placeholder(SanitizedValue):
+	"""Stands in for a value that is bound when a prepared query is called.
+	```python
+	lookup = database.prepare(SELECT (Name) - FROM (MyTable) - WHERE (ID == Placeholder("id")))
+	lookup(id=1)
+	```
+	"""
+
+	__sql_name__ : str = "Placeholder"
+	value : str
+
+	__slots__ = ()
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} {self.value!r}>"
+	
+	@property
+	def params(self):
+		return (self, )
 
 class Comparison(Operable):
 	
@@ -204,6 +240,10 @@ class Comparison(Operable):
 	operator : str
 	right : Any
 
+	parenthesized = True
+
+	__slots__ = ("left", "operator", "right", "_compiled")
+
 	def __init__(self, left, operator, right, forceLeft=False, forceRight=False):
 		if isinstance(left, SQLOOP):
 			self.left = left
@@ -226,7 +266,7 @@ class Comparison(Operable):
 		return f"<{type(self).__name__} {str(self)!r}>"
 
 	def __str__(self):
-		return f"{self.left if not isinstance(self.left, SanitizedValue) else '?'} {self.operator} {self.right if not isinstance(self.right, SanitizedValue) else '?'}"
+		return self.compile()[0]
 	
 	def __format__(self, fs):
 		return f"({format(str(self), fs)})"
@@ -246,16 +286,24 @@ class Comparison(Operable):
 	def __bool__(self):
 		return getattr(hash(self.left), OPERATOR_DUNDERS[self.operator])(hash(self.right))
 	
+	def compile(self) -> tuple[str,tuple]:
+		if (compiled := getattr(self, "_compiled", None)) is None:
+			left, leftParams = compileItem(self.left, enclosed=True)
+			right, rightParams = compileItem(self.right, enclosed=True)
+			self._compiled = compiled = self.render(left, right), leftParams + rightParams
+		return compiled
+	
+	def compileParams(self) -> tuple:
+		if (compiled := getattr(self, "_compiled", None)) is not None:
+			return compiled[1]
+		return compileItemsParams((self.left, self.right))
+	
+	def render(self, left : str, right : str) -> str:
+		return f"{left} {self.operator} {right}"
+	
 	@property
 	def params(self):
-
-		out = []
-
-		out.extend(getReadyAttr(self.left, "params", []))
-		
-		out.extend(getReadyAttr(self.right, "params", []))
-		
-		return out
+		return self.compile()[1]
 
 class Operation(Comparison):
 
@@ -272,36 +320,142 @@ class Operation(Comparison):
 		"^" : "({left} | {right}) - ({left} & {right})",
 		"|" : "{left} | {right}"
 	}
+
+	__slots__ = ()
 	
 	def __bool__(self):
 		return True
-
-	def __str__(self):
-		return self.OPERATORS[self.operator].format(left=self.left, right=self.right)
 	
-	@property
-	def params(self):
-		out = Comparison.params.fget(self)
-		if self.operator == "^":
-			out.extend(getReadyAttr(self.left, "params", []))
-			
-			out.extend(getReadyAttr(self.right, "params", []))
-		
-		return out
+	def compile(self) -> tuple[str,tuple]:
+		if (compiled := getattr(self, "_compiled", None)) is None:
+			left, leftParams = compileItem(self.left, enclosed=True)
+			right, rightParams = compileItem(self.right, enclosed=True)
+			params = leftParams + rightParams
+			self._compiled = compiled = self.render(left, right), (params + params if self.operator == "^" else params)
+		return compiled
+	
+	def compileParams(self) -> tuple:
+		if (compiled := getattr(self, "_compiled", None)) is not None:
+			return compiled[1]
+		params = compileItemsParams((self.left, self.right))
+		return params + params if self.operator == "^" else params
+
+	def render(self, left : str, right : str) -> str:
+		return self.OPERATORS[self.operator].format(left=left, right=right)
 
 class Assignment(Comparison):
 	
 	left : str|Column
-	operator : str = "="
+	operator : str
 	right : Any
 
+	__slots__ = ()
+
 	def __init__(self, left : str|Column, right : Any, hardcode=False):
-		super().__init__(left, self.operator, right, forceLeft=True, forceRight=hardcode)
+		super().__init__(left, "=", right, forceLeft=True, forceRight=hardcode)
 
 _NO_KEY_VALUE = object()
-QUERY_CACHE = {}
+QUERY_CACHE = LRUCache(4096)
+"""Rendered SQL of queries, keyed by the structure of the query (see `renderKey`)."""
+
+class RenderKey:
+	"""Structural key of a word or query (See `renderKey`). Its hash is the structural hash that the node computed when
+	it was constructed. Keys made for lookups refer to their node and are compared by walking it against the other key,
+	so looking up a key builds nothing proportional to the size of the node. Keys that are stored in a cache are
+	`frozen` first, which replaces the node by its value-free `renderShape`, so that cached keys don't keep the node
+	or the values it holds as parameters alive."""
+
+	hash : int
+	node : "Word|Query|None"
+	shape : tuple|None
+
+	__slots__ = ("hash", "node", "shape")
+
+	def __init__(self, node : "Word|Query"):
+		self.hash = node._hash
+		self.node = node
+		self.shape = None
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__} {self.hash:X}>"
+
+	def __hash__(self):
+		return self.hash
+
+	def __eq__(self, other):
+		if self is other:
+			return True
+		elif type(other) is not RenderKey or self.hash != other.hash:
+			return False
+		elif self.node is None:
+			return self.shape == other.shape if other.node is None else matchesShape(other.node, self.shape)
+		else:
+			return matchesShape(self.node, other.shape if other.node is None else renderShape(other.node))
+
+	def frozen(self) -> "RenderKey":
+		"""An equal key which holds the shape of the node instead of the node itself."""
+		if self.node is None:
+			return self
+		key = RenderKey.__new__(RenderKey)
+		key.hash, key.node, key.shape = self.hash, None, renderShape(self.node)
+		return key
+
+def renderKey(obj) -> Hashable:
+	"""Structural key of an SQL-object. Objects with equal keys render to the same SQL, regardless of the values they
+	hold as parameters."""
+	if isinstance(obj, (Word, Query)):
+		return RenderKey(obj)
+	return renderShape(obj)
+
+def renderShape(obj) -> Hashable:
+	"""Structure of an SQL-object without any of the values it holds as parameters. Words, queries, comparisons and
+	tuples are described as `(type, separator, children)`."""
+	if isinstance(obj, type):
+		return str(obj)
+	elif isinstance(obj, SanitizedValue):
+		return "?"
+	elif isinstance(obj, Query):
+		return (type(obj), obj.sep, tuple(map(renderShape, obj.words)))
+	elif isinstance(obj, Word):
+		return (type(obj), obj.sep, tuple(map(renderShape, obj.content)))
+	elif isinstance(obj, Comparison):
+		return (type(obj), obj.operator, (renderShape(obj.left), renderShape(obj.right)))
+	elif isinstance(obj, SQLTuple):
+		return (type(obj), None, tuple(map(renderShape, obj)))
+	else:
+		return str(obj)
+
+def matchesShape(obj, shape : Hashable) -> bool:
+	"""Whether `renderShape(obj) == shape`, without building the shape of `obj`."""
+	if isinstance(obj, Query):
+		sep, children = obj.sep, obj.words
+	elif isinstance(obj, Word):
+		sep, children = obj.sep, obj.content
+	elif isinstance(obj, Comparison):
+		sep, children = obj.operator, (obj.left, obj.right)
+	elif isinstance(obj, SQLTuple):
+		sep, children = None, obj
+	else:
+		return renderShape(obj) == shape
+	return type(shape) is tuple and shape[0] is type(obj) and shape[1] == sep and len(shape[2]) == len(children) \
+		and all(map(matchesShape, children, shape[2]))
+
+def structuralHash(obj) -> int:
+	"""Hash of the `renderKey` of an SQL-object. Words and queries compute theirs from the structural hashes of their
+	children when they are constructed, so this is O(1) for them."""
+	if isinstance(obj, type):
+		return hash(str(obj))
+	elif isinstance(obj, (Word, Query)):
+		return obj._hash
+	return hash(renderShape(obj))
 
 class Prefix(SQLOOP, type):
+	"""Metaclass of words. Words are compact records which only hold their content, so subclasses get empty
+	`__slots__` unless they declare their own."""
+
+	def __new__(mcs, name, bases, namespace, **kwargs):
+		namespace.setdefault("__slots__", ())
+		return super().__new__(mcs, name, bases, namespace, **kwargs)
 
 	def __str__(self):
 		return self.__name__
@@ -317,9 +471,10 @@ class PragmaMeta(Prefix):
 
 class Word(SQLOOP, metaclass=Prefix):
 	
-	content : tuple
 	sep : str = ", "
 
+	__slots__ = ("_content", "_hash", "_compiled")
+
 	def __init__(self, *args : Any, **kwargs : Any):
 		self.content = tuple(arg if isinstance(arg, SQLOOP) else SanitizedValue(arg) for arg in args) + tuple(map(lambda keyVal : Comparison(keyVal[0], "==", keyVal[1], forceLeft=True), kwargs.items()))
 
@@ -331,36 +486,66 @@ class Word(SQLOOP, metaclass=Prefix):
 		return f"<{pluralize(self.__class__.__base__.__name__)}.{self.__class__.__name__} content={self.content}>"
 		
 	def __str__(self) -> str:
-		return f"{self.__class__.__name__} {self.sep.join(map(str, self.content))}"
+		return self.compile()[0]
 
 	def __sql__(self):
 		return self.__str__()
 	
 	def __hash__(self):
-		return sql(self).__hash__()
+		return self._hash
 	
 	def __contains__(self, item):
 		return item in self.content
 	
+	@property
+	def content(self) -> tuple:
+		return self._content
+	
+	@content.setter
+	def content(self, content : tuple):
+		self._content = content
+		self._hash = hash((type(self), self.sep, *map(structuralHash, content)))
+		self._compiled = None
+	
+	def compile(self) -> tuple[str,tuple]:
+		if (compiled := self._compiled) is None:
+			content, params = compileItems(self.content, self.sep)
+			self._compiled = compiled = f"{self.__class__.__name__} {content}", params
+		return compiled
+	
+	def compileParams(self) -> tuple:
+		if (compiled := self._compiled) is not None:
+			return compiled[1]
+		return compileItemsParams(self.content)
+	
 	@property
 	def params(self):
-		out = []
-		for item in self.content:
-			out.extend(getReadyAttr(item, "params", []))
-		return out
+		return self.compile()[1]
 		
 class EnclosedWord(Word):
 	def __init__(self, *args: Any, **kwargs: Any):
 		super().__init__(*args, **kwargs)
 		self.content = SQLTuple(self.content)
-	def __str__(self):
-		return f"{self.__class__.__name__} {self.content}"
+	def compile(self) -> tuple[str,tuple]:
+		if (compiled := self._compiled) is None:
+			content, params = self.content.compile()
+			self._compiled = compiled = f"{self.__class__.__name__} {content}", params
+		return compiled
+	
+	def compileParams(self) -> tuple:
+		if (compiled := self._compiled) is not None:
+			return compiled[1]
+		return self.content.compileParams()
 
 class Query(SQLOOP):
+	"""A sequence of words. Queries chained with `-` share the words of the query they extend instead of converting
+	them again, and the SQL and parameters of the shared words are only compiled once."""
 
-	words : tuple[Word|Any] = SQLTuple()
 	startWord : Word
-	sep : str = " "
+	sep : str
+	parenthesized = True
+
+	__slots__ = ("_words", "sep", "_hash", "_compiled")
 
 	def __new__(cls, *args, **kwargs):
 		
@@ -393,13 +578,13 @@ class Query(SQLOOP):
 	def __init__(self, *words : Word|SQLTuple, sep : str=" "): ...
 
 	def __init__(self, word, *words : tuple[Word], sep : str|None=None):
-		if sep is not None:
-			self.sep = sep
-		if isinstance(word, Iterable):
-			words = (*word, *words)
+		self.sep = " " if sep is None else sep
+		if isinstance(word, SQLTuple):
+			self.words = word.extend(words)
+		elif isinstance(word, Iterable):
+			self.words = SQLTuple((*word, *words))
 		else:
-			words = (word, *words)
-		self.words = SQLTuple(SQLTuple(word) if isinstance(word, tuple) else word for word in words)
+			self.words = SQLTuple((word, *words))
 	
 	def __contains__(self, other):
 		
@@ -413,15 +598,41 @@ class Query(SQLOOP):
 			return False
 	
 	def __hash__(self):
-		return hash(self.words)
+		return self._hash
 
 	def __sql__(self):
 		return str(self)+";"
 
 	def __str__(self):
-		if (ret := QUERY_CACHE.get(hash(self), _NO_KEY_VALUE)) is _NO_KEY_VALUE:
-			ret = QUERY_CACHE[hash(self)] = self.sep.join(map(format, self.words))
-		return ret
+		return self.compile()[0]
+	
+	def compile(self) -> tuple[str,tuple]:
+		"""The SQL and parameters of the query. The SQL is looked up in `QUERY_CACHE` by the structure of the query
+		first, and only rendered if it isn't there, in which case only the parameters are collected from the words."""
+		if (compiled := self._compiled) is None:
+			key = renderKey(self)
+			if (sql := QUERY_CACHE.get(key, _NO_KEY_VALUE)) is _NO_KEY_VALUE:
+				sql, params = compileItems(self.words, self.sep, enclosed=True)
+				QUERY_CACHE[key.frozen()] = sql
+			else:
+				params = compileItemsParams(self.words)
+			self._compiled = compiled = sql, params
+		return compiled
+	
+	def compileParams(self) -> tuple:
+		if (compiled := self._compiled) is not None:
+			return compiled[1]
+		return compileItemsParams(self.words)
+	
+	@property
+	def words(self) -> tuple[Word|Any]:
+		return self._words
+	
+	@words.setter
+	def words(self, words : tuple[Word|Any]):
+		self._words = words
+		self._hash = hash((type(self), self.sep, *map(structuralHash, words)))
+		self._compiled = None
 	
 	def __format__(self, format_spec):
 		return f"({format(str(self), format_spec)})"
@@ -436,7 +647,7 @@ class Query(SQLOOP):
 		from SQLOOP._core.Schema import ALL
 		return type(self)((*self.words[:-1], self.words[-1](ALL)), right)
 	
-	@cached_property
+	@property
 	def startWord(self):
 		
 		from SQLOOP._core.Functions import recursiveWalk
@@ -468,15 +679,12 @@ class Query(SQLOOP):
 	@property
 	def content(self):
 		for word in self.words:
-			if hasattr(word, "content"):
+			if not isinstance(word, type) and hasattr(word, "content"):
 				return word.content
 	
 	@property
 	def params(self):
-		params = []
-		for word in self.words:
-			params.extend(getReadyAttr(word, "params", []))
-		return params
+		return self.compile()[1]
 
 class TableMeta(SQLStructure):
 
@@ -1,8 +1,10 @@
 
 from threading import Thread, Lock
-import sqlite3, logging
+from typing import Generator, Iterable, Callable, Any
+import sqlite3, logging, itertools, time, sys, weakref
 from queue import Queue, Empty as EmptyQueueException
 import SQLOOP.Globals as Globals
+from SQLOOP._core.Statistics import QueryStats, SlowQueryLog
 import queue
 
 class CursorLike:
@@ -21,6 +23,99 @@ class CursorLike:
 			return None
 	def fetchall(self):
 		return self.data
+	def close(self):
+		pass
+
+class StreamCursor(CursorLike):
+	"""Cursor whose rows are pushed by the worker thread in chunks of `chunkSize` rows through a buffer that holds at
+	most `maxChunks` chunks. Rows can only be iterated once. Closing the cursor (or dropping all references to it) before
+	it is exhausted cancels the rest of the query."""
+
+	buffer : Queue[tuple[list|Exception,bool]]
+	chunkSize : int
+	cancelled : bool
+	exhausted : bool
+	exception : Exception|None
+	listener : Callable|None
+	"""Called by the worker thread every time something has been put in the buffer."""
+	statement : str|None
+	params : list
+	waitTime : float
+	executeTime : float
+	fetchTime : float
+	"""Seconds the worker thread has spent fetching rows for the stream so far."""
+
+	def __init__(self, queue : Queue, chunkSize : int, maxChunks : int, listener : Callable=None):
+		self.buffer = Queue(maxsize=maxChunks)
+		self.chunkSize = chunkSize
+		self.cancelled = False
+		self.exhausted = False
+		self.exception = None
+		self.listener = listener
+		self.statement = None
+		self.params = []
+		self.waitTime = 0.0
+		self.executeTime = 0.0
+		self.fetchTime = 0.0
+		self._queue = queue
+		self._rows = iter(())
+	def __iter__(self):
+		return self
+	def __next__(self):
+		while True:
+			try:
+				return next(self._rows)
+			except StopIteration:
+				if (chunk := self.nextChunk()) is None:
+					raise StopIteration()
+				self._rows = iter(chunk)
+	def __del__(self):
+		self.close()
+	def nextChunk(self, block : bool=True) -> list|None:
+		"""Blocks until the next chunk of rows has been pushed by the worker. Returns None when exhausted. If `block` is
+		False, then `queue.Empty` is raised instead of blocking."""
+		if self.exhausted or self.cancelled:
+			return None
+		chunk, done = self.buffer.get(block=block)
+		if done:
+			self.exhausted = True
+		else:
+			self._queue.put([None, None, None, None, None]) # Wake the worker, there is room for another chunk
+		if isinstance(chunk, Exception):
+			raise chunk
+		return chunk
+	def chunks(self) -> Generator[list,None,None]:
+		while (chunk := self.nextChunk()) is not None:
+			yield chunk
+	def fetchone(self):
+		return next(self, None)
+	def fetchall(self):
+		return list(self)
+	def close(self):
+		if not self.exhausted and not self.cancelled:
+			self.cancelled = True
+			self._queue.put([None, None, None, None, None])
+	def put(self, chunk : list|Exception, done : bool):
+		self.buffer.put((chunk, done))
+		if self.listener is not None:
+			try:
+				self.listener()
+			except Exception:
+				pass
+
+class FutureLock:
+	"""Stands in for the `Lock` of a queued statement. When the worker thread releases it, the callback is scheduled on
+	the event loop instead of waking a blocked thread."""
+
+	def __init__(self, loop, callback : Callable):
+		self.loop = loop
+		self.callback = callback
+	def release(self):
+		self.loop.call_soon_threadsafe(self.callback)
+
+class Batch(list):
+	"""Rows of parameters that are executed with a single statement through `sqlite3.Connection.executemany` in a
+	single transaction."""
 
 class ThreadConnection:
 
@@ -29,18 +124,82 @@ class ThreadConnection:
 	REFERENCE : "ThreadConnection"
 	CACHE_LOCK = Lock()
 	CLOSED : bool
+	CHUNK_SIZE : int = 1024
+	"""Number of rows fetched at a time for streamed results."""
+	MAX_CHUNKS : int = 4
+	"""Number of fetched chunks a streamed result may buffer before the worker waits for the consumer."""
+	STREAM_POLL : float = 0.01
+	"""Seconds the worker waits for new statements while it has streams waiting to be consumed."""
 
-	queue : Queue[list[str,list,Lock, list]]
+	queue : Queue[list[str,list,Lock,list,float]]
+	readQueue : Queue[list[str,list,Lock,list,float]]
+	"""Queue of read-only statements. Is the same object as `queue` unless the connection was opened with readers."""
 	queueLock : Lock
 	running : bool
+	inTransaction : bool
+	"""Whether the writer connection is inside a transaction. While it is, reads are routed to the writer so that they
+	see the uncommitted changes."""
+	groupCommit : bool
+	"""Whether the writer coalesces queued INSERT/UPDATE/DELETE-statements into shared transactions."""
+	maxGroupSize : int
+	"""Largest number of statements committed in one shared transaction."""
+	maxGroupDelay : float
+	"""Longest time in seconds the writer waits for more statements to join a shared transaction."""
+	rowChanges : dict[str,int]
+	"""Number of rows changed per table since the table was last analyzed."""
+	lastAnalyzed : dict[str,float]
+	"""Time (As given by `time.time`) when each table was last analyzed."""
+	analyzeThreshold : int|None
+	"""Number of changed rows after which the writer runs ANALYZE on a table, once outside of a transaction. Never if
+	None."""
+	optimizeOnClose : bool
+	"""Whether the writer runs `PRAGMA optimize` before its connection is closed."""
+	readonly : bool
+	"""Whether the file was opened read-only, in which case the journal mode is left as it is."""
+	pragmas : dict[str,Any]
+	"""PRAGMA-statements that are run on every connection opened by the worker threads, as pairs of pragma name and
+	value. `journal_mode` is only set by the writer, and not at all if the connection is read-only or has readers (Which
+	need WAL)."""
+	pragmaVersion : int
+	"""Incremented by `setPragmas`, so that the worker threads know to apply the new pragmas."""
+	tableChanges : dict[str,int]
+	"""Number of INSERT/UPDATE/DELETE-statements the writer has executed per table. Used to tell when data cached from a
+	table is out of date."""
+	stats : QueryStats
+	"""Timings of the statements served by the worker threads, and gauges of the queues and workers. (See `QueryStats`)"""
+	slowQueries : SlowQueryLog|None
+	"""Log of slow and sampled statements, checked by the worker thread after every statement. Not logged if None."""
+	advisor : "IndexAdvisor|None"
+	"""Index advisor shown every statement served by the worker threads, if any."""
 	
 	filename : str
 	_thread : Thread
+	_readers : list[Thread]
 	@property
 	def _connection(self) -> "ThreadConnection":
 		return self
 
-	def __init__(self, filename : str, factory=sqlite3.Connection, identifier=0, *, logger : logging.Logger=None):
+	def __init__(self, filename : str, factory=sqlite3.Connection, identifier=0, *, readers : int=0,
+			  groupCommit : bool=False, maxGroupSize : int=100, maxGroupDelay : float=0.001, uri : bool=False,
+			  readonly : bool=False, pragmas : dict[str,Any]=None, analyzeThreshold : int=None, optimizeOnClose : bool=False,
+			  instrument : bool=True, logger : logging.Logger=None):
+		"""Opens (or joins an already opened) worker thread for the given file. If `readers` is larger than 0, then that
+		many additional reader threads are opened on the same file in WAL journal mode. Read-only statements are then
+		served by the readers, while everything else is served by the single writer thread.
+		
+		If `groupCommit` is True, then the writer drains up to `maxGroupSize` queued INSERT/UPDATE/DELETE-statements,
+		waiting at most `maxGroupDelay` seconds for more to arrive, and commits them in one transaction. Each statement is
+		run in its own savepoint, so every caller still gets its own result or error.
+		
+		If `uri` is True, then `filename` is opened as an SQLite URI (`file:...?mode=ro`). `pragmas` are run on every
+		connection when it is opened.
+		
+		If `analyzeThreshold` is given, then the writer runs ANALYZE on every table that has had that many rows changed,
+		after serving the statement that crossed the threshold and outside of any transaction. If `optimizeOnClose` is
+		True, then the writer runs `PRAGMA optimize` before it closes.
+		
+		If `instrument` is True, then the time every statement spends queued, executing and fetching is recorded in
+		`stats`."""
 		if logger:
 			self.LOG = logger
 		with self.CACHE_LOCK:
@@ -57,63 +216,386 @@ class ThreadConnection:
 			
 			self.running = True
 			self.CLOSED = False
+			self.inTransaction = False
+			self.groupCommit = groupCommit
+			self.maxGroupSize = maxGroupSize
+			self.maxGroupDelay = maxGroupDelay
+			self.tableChanges = {}
+			self.rowChanges = {}
+			self.lastAnalyzed = {}
+			self.analyzeThreshold = analyzeThreshold
+			self.optimizeOnClose = optimizeOnClose
+			self.uri = uri
+			self.readonly = readonly
+			self.pragmas = dict(pragmas or {})
+			self.pragmaVersion = 0
+			self.stats = QueryStats(enabled=instrument)
+			self.slowQueries = None
+			self.advisor = None
 			self.queue = Queue()
 			self.queueLock = Lock()
 			self.filename = filename
 			self._factory = factory
+			if readers > 0 and filename not in ("", ":memory:"):
+				self.readQueue = Queue()
+				self._readers = [Thread(target=self.readLoop, daemon=True) for _ in range(readers)]
+			else:
+				self.readQueue = self.queue
+				self._readers = []
 			self._thread = Thread(target=self.mainLoop, daemon=True)
 			self._thread.start()
 
 	def __getattr__(self, name):
+		if name == "REFERENCE":
+			raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
 		return getattr(self.REFERENCE, name)
 
+	def connect(self, writer : bool=False, defaults : dict[str,Any]=None) -> sqlite3.Connection:
+		_connection = sqlite3.connect(self.filename, factory=self._factory, uri=self.uri)
+		self.applyPragmas(_connection, writer, defaults)
+		return _connection
+	
+	def applyPragmas(self, _connection : sqlite3.Connection, writer : bool=False, defaults : dict[str,Any]=None):
+		"""Runs the pragmas on the connection. If `defaults` is given, then the value each pragma had on the connection
+		before it was first set is kept in it, and pragmas that are no longer set are set back to that value."""
+		for name, value in self.pragmas.items():
+			if name == "journal_mode" and (not writer or self.readonly or self._readers):
+				continue
+			try:
+				if defaults is not None and name not in defaults:
+					row = _connection.execute(f"PRAGMA {name};").fetchone()
+					defaults[name] = row[0] if row else None
+				_connection.execute(f"PRAGMA {name}={value};")
+			except Exception as e:
+				self.LOG.exception(e)
+		if defaults is not None:
+			for name in [name for name in defaults if name not in self.pragmas]:
+				value = defaults.pop(name)
+				if value is None:
+					continue
+				try:
+					_connection.execute(f"PRAGMA {name}={value};")
+				except Exception as e:
+					self.LOG.exception(e)
+	
+	def setPragmas(self, pragmas : dict[str,Any]):
+		"""Replaces the pragmas of the connection. Every worker thread applies them before it serves its next statement
+		outside of a transaction. Pragmas that are left out are set back to the value they had before they were first
+		set."""
+		owner = getattr(self, "REFERENCE", self)
+		owner.pragmas = dict(pragmas)
+		owner.pragmaVersion += 1
+
+	def setSlowQueryLog(self, log : SlowQueryLog|None):
+		"""Replaces the slow query log of the connection. Every worker thread checks it after its next statement."""
+		owner = getattr(self, "REFERENCE", self)
+		owner.slowQueries = log
+
+	def setIndexAdvisor(self, advisor : "IndexAdvisor|None"):
+		"""Replaces the index advisor of the connection."""
+		owner = getattr(self, "REFERENCE", self)
+		owner.advisor = advisor
+
+	def observe(self, _connection : sqlite3.Connection, string : str, params : list, wait : float, execute : float, fetch : float):
+		"""Shows a served statement and its timings to the slow query log and index advisor, if there are any."""
+		if self.slowQueries is not None:
+			self.slowQueries.check(_connection, string, params, wait, execute, fetch)
+		if self.advisor is not None:
+			self.advisor.observe(_connection, string, params, execute + fetch)
+
 	def mainLoop(self):
+		def connectWriter(defaults : dict[str,Any]):
+			_connection = self.connect(writer=True, defaults=defaults)
+			if self._readers:
+				if not self.readonly:
+					_connection.execute("PRAGMA journal_mode=WAL;")
+				for reader in self._readers:
+					reader.start()
+			return _connection
+		self.serve(self.queue, connectWriter, writer=True)
+
+	def readLoop(self):
+		self.serve(self.readQueue, self.connect)
+
+	def serve(self, queue : Queue, connect, writer : bool=False):
+		_connection = None
+		streams : list[tuple[sqlite3.Cursor,weakref.ref[StreamCursor]]] = []
+		pending = None
+		defaults = {}
 		try:
-			_connection = sqlite3.connect(self.filename, factory=self._factory)
+			_connection = connect(defaults=defaults)
+			pragmaVersion = self.pragmaVersion
 			while self.running:
 				try:
-					string, params, lock, results = self.queue.get(timeout=15)
+					streams[:] = [entry for entry in streams if self.pushChunk(*entry)]
+					if any(stream is not None and not stream.buffer.full() for stream in (ref() for _, ref in streams)):
+						timeout = 0
+					elif streams:
+						timeout = self.STREAM_POLL
+					else:
+						timeout = 15
+					if pending is not None:
+						(string, params, lock, results, enqueued), pending = pending, None
+					else:
+						string, params, lock, results, enqueued = queue.get(timeout=timeout)
 					if string is None and lock is None:
+						queue.task_done()
 						continue
+					started = time.perf_counter()
+					stats = self.stats if self.stats.enabled and isinstance(string, str) else None
+					if stats is not None:
+						stats.record(string, "wait", started - enqueued)
+						stats.busy()
+					if pragmaVersion != self.pragmaVersion and not _connection.in_transaction:
+						pragmaVersion = self.pragmaVersion
+						self.applyPragmas(_connection, writer, defaults)
+					if writer and self.groupCommit and not _connection.in_transaction and self.isGroupable(string, params, results):
+						pending = self.executeGroup(_connection, queue, [string, params, lock, results, enqueued])
+						self.inTransaction = _connection.in_transaction
+						if stats is not None:
+							stats.idle(time.perf_counter() - started)
+						if self.analyzeThreshold and not _connection.in_transaction:
+							self.analyzeChanged(_connection)
+						continue
+					executed = fetched = None
 					try:
-						results.extend(_connection.execute(string, params).fetchall())
+						if isinstance(results, StreamCursor):
+							results.statement, results.params = string, params
+							streams.append((_connection.execute(string, params), weakref.ref(results)))
+							executed = time.perf_counter()
+							results.waitTime, results.executeTime = started - enqueued, executed - started
+							if not self.pushChunk(*streams[-1]):
+								streams.pop()
+						elif isinstance(params, Batch):
+							results.append(self.executeBatch(_connection, string, params))
+							executed = time.perf_counter()
+							if writer:
+								self.noteChange(string, results[-1])
+						elif callable(string):
+							results.append(string(_connection, *params))
+						else:
+							cursor = _connection.execute(string, params)
+							executed = time.perf_counter()
+							results.extend(cursor.fetchall())
+							fetched = time.perf_counter()
+							if writer:
+								self.noteChange(string, cursor.rowcount)
 					except Exception as e:
 						self.LOG.exception(e)
 						try:
-							results.append(e)
+							if isinstance(results, StreamCursor):
+								results.exception = e
+							else:
+								results.append(e)
 						except:
 							pass
+					if executed is not None and not isinstance(results, StreamCursor):
+						self.observe(_connection, string, params[0] if isinstance(params, Batch) and params else params,
+							started - enqueued, executed - started, (fetched or executed) - executed)
+					if writer:
+						self.inTransaction = _connection.in_transaction
 					try:
 						lock.release()
 					except:
 						pass
-					self.queue.task_done()
+					queue.task_done()
+					lock = results = None # Streams are only referenced weakly while they are being consumed
+					if stats is not None:
+						if executed is not None:
+							stats.record(string, "execute", executed - started)
+						if fetched is not None:
+							stats.record(string, "fetch", fetched - executed)
+						stats.idle(time.perf_counter() - started)
+					if writer and self.analyzeThreshold and not _connection.in_transaction:
+						self.analyzeChanged(_connection)
 				except EmptyQueueException:
 					pass
 				except Exception as e:
 					self.LOG.exception(e)
 			self.running = False
+			self.endStreams(streams)
+			if writer and self.optimizeOnClose and not self.readonly:
+				try:
+					_connection.execute("PRAGMA optimize;")
+				except Exception as e:
+					self.LOG.exception(e)
 			_connection.close()
 		except Exception as e:
 			self.running = False
-			_connection.close()
+			self.endStreams(streams)
+			if _connection is not None:
+				_connection.close()
 			self.LOG.exception(e)
 			try:
 				results.append(e)
 				lock.release()
 			except:
 				pass
-			for _ in range(self.queue.unfinished_tasks):
-				string, params, lock, results = self.queue.get(timeout=15)
+			for _ in range(queue.unfinished_tasks):
+				string, params, lock, results, enqueued = queue.get(timeout=15)
 				if lock is not None:
 					lock.release()
 
+	def noteChange(self, string : str, rows : int=1):
+		if isinstance(string, str) and (match := Globals.changeCommand.match(string)) is not None:
+			table = match.group("table").split(".")[-1].lower()
+			self.tableChanges[table] = self.tableChanges.get(table, 0) + 1
+			self.rowChanges[table] = self.rowChanges.get(table, 0) + max(rows, 0)
+	
+	def analyzeChanged(self, _connection : sqlite3.Connection):
+		tables = [table for table, rows in self.rowChanges.items() if rows >= self.analyzeThreshold]
+		if tables:
+			self.analyzeTables(_connection, tables)
+
+	def analyzeTables(self, _connection : sqlite3.Connection, tables : Iterable[str]=None):
+		"""Runs ANALYZE on the given tables, or on the whole database if None, and records when they were analyzed."""
+		now = time.time()
+		if tables is None:
+			_connection.execute("ANALYZE;")
+			tables = [name for name, in _connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';")]
+			self.rowChanges.clear()
+		else:
+			tables = [table.lower() for table in tables]
+			for table in tables:
+				self.rowChanges.pop(table, None)
+				_connection.execute(f"ANALYZE {table};")
+		for table in tables:
+			self.lastAnalyzed[table.lower()] = now
+
+	def isGroupable(self, string, params, results) -> bool:
+		return isinstance(string, str) and isinstance(results, list) and not isinstance(params, Batch) \
+			and Globals.changeCommand.match(string) is not None
+
+	def executeGroup(self, _connection : sqlite3.Connection, queue : Queue, first : list) -> list|None:
+		"""Executes the given statement together with all groupable statements that arrive in the queue within
+		`maxGroupDelay` seconds, in one transaction. Returns the first queued item that could not join the group, if
+		any, so that it can be served next."""
+		group = [first]
+		leftover = None
+		deadline = time.monotonic() + self.maxGroupDelay
+		while len(group) < self.maxGroupSize:
+			try:
+				item = queue.get(timeout=max(0, deadline - time.monotonic()))
+			except EmptyQueueException:
+				break
+			if item[0] is None and item[2] is None:
+				queue.task_done()
+			elif self.isGroupable(*item[:2], item[3]):
+				if self.stats.enabled:
+					self.stats.record(item[0], "wait", time.perf_counter() - item[4])
+				group.append(item)
+			else:
+				leftover = item
+				break
+		
+		failed = set()
+		try:
+			_connection.execute("BEGIN;")
+			for i, (string, params, lock, results, enqueued) in enumerate(group):
+				_connection.execute("SAVEPOINT grouped_statement;")
+				try:
+					started = time.perf_counter()
+					cursor = _connection.execute(string, params)
+					results.extend(cursor.fetchall())
+					executed = time.perf_counter()
+					if self.stats.enabled:
+						self.stats.record(string, "execute", executed - started)
+					self.observe(_connection, string, params, started - enqueued, executed - started, 0.0)
+					self.noteChange(string, cursor.rowcount)
+				except Exception as e:
+					self.LOG.exception(e)
+					results.append(e)
+					failed.add(i)
+					_connection.execute("ROLLBACK TO grouped_statement;")
+				_connection.execute("RELEASE grouped_statement;")
+			_connection.execute("COMMIT;")
+		except Exception as e:
+			self.LOG.exception(e)
+			if _connection.in_transaction:
+				_connection.execute("ROLLBACK;")
+			for i, (string, params, lock, results, enqueued) in enumerate(group):
+				if i not in failed:
+					results.append(e)
+		
+		for string, params, lock, results, enqueued in group:
+			try:
+				lock.release()
+			except:
+				pass
+			queue.task_done()
+		return leftover
+
+	def executeBatch(self, _connection : sqlite3.Connection, string : str, rows : Batch) -> int:
+		"""Executes the statement for all rows in one transaction, unless a transaction is already open, in which case
+		the rows become part of it. Returns the number of modified rows."""
+		if _connection.in_transaction:
+			return _connection.executemany(string, rows).rowcount
+		_connection.execute("BEGIN;")
+		try:
+			count = _connection.executemany(string, rows).rowcount
+		except:
+			_connection.execute("ROLLBACK;")
+			raise
+		_connection.execute("COMMIT;")
+		return count
+
+	def pushChunk(self, cursor : sqlite3.Cursor, ref : weakref.ref[StreamCursor]) -> bool:
+		"""Pushes the next chunk of rows from the cursor into the buffer of the stream, if there is room for it. Returns
+		False once the stream is finished, cancelled or garbage collected. The worker only holds weak references to
+		streams, so that a stream which is abandoned before it is exhausted is cancelled when it is collected."""
+		if (stream := ref()) is None or stream.cancelled:
+			cursor.close()
+			return False
+		elif stream.buffer.full():
+			return True
+		started = time.perf_counter()
+		try:
+			chunk = cursor.fetchmany(stream.chunkSize)
+		except Exception as e:
+			stream.put(e, True)
+			cursor.close()
+			return False
+		stream.fetchTime += time.perf_counter() - started
+		if len(chunk) < stream.chunkSize:
+			stream.put(chunk, True)
+			cursor.close()
+			if self.stats.enabled and stream.statement is not None:
+				self.stats.record(stream.statement, "fetch", stream.fetchTime)
+			if stream.statement is not None:
+				self.observe(cursor.connection, stream.statement, stream.params, stream.waitTime, stream.executeTime, stream.fetchTime)
+			return False
+		stream.put(chunk, False)
+		return True
+
+	def endStreams(self, streams : list[tuple[sqlite3.Cursor,weakref.ref[StreamCursor]]]):
+		for cursor, ref in streams:
+			cursor.close()
+			if (stream := ref()) is None:
+				continue
+			while not stream.buffer.empty():
+				stream.buffer.get_nowait()
+			stream.put(sqlite3.ProgrammingError("Cannot operate on a closed database."), True)
+		streams.clear()
+
+	def getQueue(self, string : str) -> Queue:
+		"""The queue of the thread which should serve the given statement."""
+		if self._readers and not self.inTransaction and Globals.readOnlyCommand.match(string):
+			return self.readQueue
+		else:
+			return self.queue
+
+	def enqueue(self, queue : Queue, string : str|Callable, params : list, lock : Lock, results : list|StreamCursor):
+		"""Puts a statement in the queue of a worker thread, stamped with the time it was queued."""
+		queue.put([string, params, lock, results, time.perf_counter()])
+		if self.stats.enabled:
+			self.stats.enqueued(queue.qsize())
+
 	def execute(self, string : str, params : list=[]):
 		lock = Lock()
 		lock.acquire()
 		results = []
 		with self.queueLock:
-			self.queue.put([string, params, lock, results])
+			self.enqueue(self.getQueue(string), string, params, lock, results)
 		
 		if not self._thread.is_alive() or not self.running:
 			raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
@@ -124,18 +606,88 @@ class ThreadConnection:
 			raise results[-1]
 		
 		return CursorLike(results)
+
+	def stream(self, string : str, params : list=[], chunkSize : int=None) -> StreamCursor:
+		"""Like `execute`, but returns as soon as the first chunk of rows has been fetched. The rest of the rows are
+		fetched in chunks by the worker thread as the returned cursor is consumed."""
+		lock = Lock()
+		lock.acquire()
+		queue = self.getQueue(string)
+		stream = StreamCursor(queue, chunkSize or self.CHUNK_SIZE, self.MAX_CHUNKS)
+		with self.queueLock:
+			self.enqueue(queue, string, params, lock, stream)
+		
+		if not self._thread.is_alive() or not self.running:
+			raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+		
+		lock.acquire()
+
+		if stream.exception is not None:
+			raise stream.exception
+		
+		return stream
+	
+	def submit(self, string : str, params : list=[], *, stream : bool=False, chunkSize : int=None, listener : Callable=None) -> "asyncio.Future[CursorLike|StreamCursor]":
+		"""Queues the statement without waiting for it and returns an `asyncio.Future` of the running event loop. The
+		future is completed from the worker thread through `loop.call_soon_threadsafe`. If `stream` is True, the future
+		results in a `StreamCursor` whose `listener` is called every time a chunk arrives."""
+		import asyncio
+		loop = asyncio.get_running_loop()
+		future = loop.create_future()
+		queue = self.getQueue(string)
+		if stream:
+			results = StreamCursor(queue, chunkSize or self.CHUNK_SIZE, self.MAX_CHUNKS, listener=listener)
+		else:
+			results = []
+		
+		def resolve():
+			if future.done():
+				return
+			elif stream and results.exception is not None:
+				future.set_exception(results.exception)
+			elif not stream and results and isinstance(results[-1], Exception):
+				future.set_exception(results[-1])
+			else:
+				future.set_result(results if stream else CursorLike(results))
+
+		with self.queueLock:
+			self.enqueue(queue, string, params, FutureLock(loop, resolve), results)
+		
+		if not self._thread.is_alive() or not self.running:
+			raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+		
+		return future
 	
+	def call(self, func : Callable, *args) -> Any:
+		"""Runs `func(connection, *args)` in the writer thread, with the writer's `sqlite3.Connection`, and returns the
+		result. Used for objects, like blob handles, that may only be used from the thread that created them."""
+		lock = Lock()
+		lock.acquire()
+		results = []
+		with self.queueLock:
+			self.enqueue(self.queue, func, args, lock, results)
+		
+		if not self._thread.is_alive() or not self.running:
+			raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+		
+		lock.acquire()
+
+		if results and isinstance(results[-1], Exception):
+			raise results[-1]
+		
+		return results[0] if results else None
+
 	def executemany(self, *statements : tuple[str, list]):
 		fakeLock = lambda :None
 		fakeLock.release = lambda :None
 
 		with self.queueLock:
-			results = [[] for _ in len(statements)]
+			results = [[] for _ in range(len(statements))]
 			for i, statement in enumerate(statements[:-1]):
-				self.queue.put([*statement, fakeLock, results[i]])
+				self.enqueue(self.queue, *statement, fakeLock, results[i])
 			lock = Lock()
 			lock.acquire()
-			self.queue.put([*statements[-1], lock, results[-1]])
+			self.enqueue(self.queue, *statements[-1], lock, results[-1])
 		
 		if not self._thread.is_alive() or not self.running:
 			raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
@@ -146,6 +698,16 @@ class ThreadConnection:
 		
 		return results
 
+	def bulk(self, string : str, rows : Iterable[tuple], batchSize : int=1000) -> int:
+		"""Executes the parameterized statement once for every row of parameters in `rows`, which may be any iterable
+		or generator. Rows are sent to the worker `batchSize` at a time and each batch is executed in one transaction.
+		Returns the number of modified rows."""
+		count = 0
+		rows = iter(rows)
+		while batch := Batch(itertools.islice(rows, batchSize)):
+			count += self.execute(string, batch).fetchone()
+		return count
+
 	def close(self, identifier=0):
 		import inspect
 		from pprint import pformat
@@ -157,11 +719,28 @@ class ThreadConnection:
 					self.REFERENCE.running = False
 				else:
 					self.running = False
-				self.queue.put([None, None, None, None])
+				self.queue.put([None, None, None, None, None])
+				for _ in self._readers:
+					self.readQueue.put([None, None, None, None, None])
 				self._thread.join()
+				for reader in self._readers:
+					if reader.is_alive():
+						reader.join()
+	
+	def closeLater(self, identifier=0):
+		"""Closes the connection for `identifier` from a separate thread. Used by finalizers, which the garbage collector
+		may run in any thread and at any point, including while `CACHE_LOCK` is held or inside the worker thread itself.
+		While the interpreter is shutting down no new threads can start, so the connection is closed right away."""
+		if sys.is_finalizing():
+			self.close(identifier)
+		else:
+			Thread(target=self.close, args=(identifier,), daemon=True).start()
 	
 	def commit(self):
 		self.execute("COMMIT;")
 
 	def __del__(self):
-		self.close()
\ No newline at end of file
+		try:
+			self.closeLater()
+		except:
+			pass
\ No newline at end of file
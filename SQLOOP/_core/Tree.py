@@ -4,8 +4,14 @@ import SQLOOP.Globals as Globals
 from SQLOOP._core.Structures import *
 from SQLOOP._core.Words import *
 from SQLOOP._core.Databases import *
+from array import array
 
 class Branch:
+	"""A node in a tree stored as (parent, child) rows in `table`. `parent` and `children` look up one step of the
+	tree at a time, while `descendants`, `ancestors` and `path` each walk the tree in a single recursive query and
+	stream back `(Branch, depth)` pairs. Rows where a node is its own parent (a common way of marking the root) are
+	not followed, and neither are rows that lead back to a node already on the walked path, so cycles in the table end
+	the walk instead of making it recurse forever."""
 
 	database : "Database"
 	table : "Table"
@@ -13,10 +19,22 @@ class Branch:
 	childCol : "Column"
 	node : Any
 
+	BATCH_SIZE : int = 500
+	"""Largest number of nodes put in a single `IN (...)` by `childrenOf`."""
+
 	def __init__(self, database : "Database", node : Any):
 		self.database = database
 		self.node = node
 	
+	def __repr__(self):
+		return f"<{self.__class__.__name__} node={self.node!r}>"
+
+	def __eq__(self, other):
+		return isinstance(other, Branch) and self.node == other.node and self.database is other.database
+	
+	def __hash__(self):
+		return hash(self.node)
+
 	@property
 	def parent(self) -> Union["Branch", None]:
 		try:
@@ -27,4 +45,311 @@ class Branch:
 	@property
 	def children(self) -> Generator["Branch",None,None]:
 		for childNode in self.database[self.childCol, self.table, self.parentCol == self.node]:
-			yield self.__class__(self.database, childNode)
\ No newline at end of file
+			yield self.__class__(self.database, childNode)
+	
+	@classmethod
+	def names(cls) -> tuple[str,str,str]:
+		return cls.table.__sql_name__, cls.parentCol.__sql_name__, cls.childCol.__sql_name__
+
+	def descendants(self, maxDepth : int=None) -> Generator[tuple["Branch",int],None,None]:
+		"""All nodes below this one, breadth first, with the number of steps down to them. Stops after `maxDepth` steps
+		if given."""
+		if maxDepth is not None and maxDepth < 1:
+			return
+		table, parent, child = self.names()
+		limit = "" if maxDepth is None else "AND subtree.depth < ?"
+		sql = f"""WITH RECURSIVE subtree(node, depth, visited) AS (
+			SELECT {child}, 1, '/' || quote({parent}) || '/' || quote({child}) || '/' FROM {table}
+			WHERE {parent} = ? AND {child} != {parent}
+			UNION ALL
+			SELECT t.{child}, subtree.depth + 1, subtree.visited || quote(t.{child}) || '/' FROM {table} AS t
+			JOIN subtree ON t.{parent} = subtree.node
+			WHERE t.{child} != t.{parent} AND instr(subtree.visited, '/' || quote(t.{child}) || '/') = 0 {limit}
+			ORDER BY 2
+		) SELECT node, depth FROM subtree"""
+		for node, depth in self.database(sql, [self.node] if maxDepth is None else [self.node, maxDepth]):
+			yield self.__class__(self.database, node), depth
+	
+	def ancestors(self) -> Generator[tuple["Branch",int],None,None]:
+		"""All nodes above this one, from the parent up to the root, with the number of steps up to them."""
+		table, parent, child = self.names()
+		sql = f"""WITH RECURSIVE lineage(node, depth, visited) AS (
+			SELECT {parent}, 1, '/' || quote({child}) || '/' || quote({parent}) || '/' FROM {table}
+			WHERE {child} = ? AND {parent} IS NOT NULL AND {parent} != {child}
+			UNION ALL
+			SELECT t.{parent}, lineage.depth + 1, lineage.visited || quote(t.{parent}) || '/' FROM {table} AS t
+			JOIN lineage ON t.{child} = lineage.node
+			WHERE t.{parent} IS NOT NULL AND t.{parent} != t.{child} AND instr(lineage.visited, '/' || quote(t.{parent}) || '/') = 0
+		) SELECT node, depth FROM lineage"""
+		for node, depth in self.database(sql, [self.node]):
+			yield self.__class__(self.database, node), depth
+	
+	def path(self, to : Union["Branch",Any]) -> Generator[tuple["Branch",int],None,None]:
+		"""The nodes from this one up to the closest common ancestor and down to `to`, with the number of steps from
+		this node. Yields nothing if the two nodes aren't in the same tree."""
+		table, parent, child = self.names()
+		sql = f"""WITH RECURSIVE ends(side, node) AS (
+			VALUES (0, ?), (1, ?)
+		), up(side, node, depth, visited) AS (
+			SELECT side, node, 0, '/' || quote(node) || '/' FROM ends
+			UNION ALL
+			SELECT up.side, t.{parent}, up.depth + 1, up.visited || quote(t.{parent}) || '/' FROM {table} AS t
+			JOIN up ON t.{child} = up.node
+			WHERE t.{parent} IS NOT NULL AND t.{parent} != t.{child} AND instr(up.visited, '/' || quote(t.{parent}) || '/') = 0
+		), meet(a, b) AS (
+			SELECT x.depth, y.depth FROM up AS x JOIN up AS y ON x.node = y.node AND x.side = 0 AND y.side = 1
+			ORDER BY x.depth + y.depth LIMIT 1
+		) SELECT node, depth FROM up WHERE side = 0 AND depth <= (SELECT a FROM meet)
+		UNION ALL
+		SELECT node, (SELECT a + b FROM meet) - depth FROM up WHERE side = 1 AND depth < (SELECT b FROM meet)
+		ORDER BY 2"""
+		for node, depth in self.database(sql, [self.node, to.node if isinstance(to, Branch) else to]):
+			yield self.__class__(self.database, node), depth
+
+	@classmethod
+	def index(cls, database : "Database") -> "TreeIndex":
+		"""Loads the whole tree into memory. See `TreeIndex`."""
+		return TreeIndex(cls, database)
+
+	@classmethod
+	def childrenOf(cls, database : "Database", nodes : Iterable[Union["Branch",Any]]) -> Generator[tuple["Branch","Branch"],None,None]:
+		"""Children of a whole frontier of nodes, as `(parent, child)` pairs. Takes one query per `BATCH_SIZE` nodes
+		instead of one query per node."""
+		table, parent, child = cls.names()
+		nodes = [node.node if isinstance(node, Branch) else node for node in nodes]
+		for i in range(0, len(nodes), cls.BATCH_SIZE):
+			batch = nodes[i:i+cls.BATCH_SIZE]
+			sql = f"SELECT {parent}, {child} FROM {table} WHERE {parent} IN ({', '.join('?'*len(batch))}) AND {child} != {parent}"
+			for parentNode, childNode in database(sql, batch):
+				yield cls(database, parentNode), cls(database, childNode)
+
+
+class TreeIndex:
+	"""The whole tree of a `Branch` class loaded into flat arrays, for answering parent, children, depth and lowest
+	common ancestor queries without touching SQLite. Nodes are numbered in the order they are loaded, and the tree is
+	stored as an array of parent numbers, children grouped by parent in one array with offsets into it, and an Euler
+	tour of the tree with a sparse table of minimum depths over it. The parent and depth of a node are looked up in
+	constant time, and so is the lowest common ancestor of two nodes.
+
+	The index is reloaded the next time it is used after the table has been changed through the database's
+	connection. Changes made by other connections to the same file are not seen."""
+
+	branch : type[Branch]
+	database : "Database"
+	version : int|None
+	nodes : list[Any]
+	positions : dict[Any,int]
+	parents : array
+	"""Number of the parent of every node, or -1 for roots."""
+	depths : array
+	roots : array
+	childOffsets : array
+	"""The children of node `i` are `childIndices[childOffsets[i]:childOffsets[i+1]]`."""
+	childIndices : array
+	euler : array
+	first : array
+	"""Position of the first visit of every node in `euler`."""
+	sparse : list[array]
+	"""`sparse[k][i]` is the shallowest node in `euler[i:i+2**k]`."""
+
+	def __init__(self, branch : type[Branch], database : "Database"):
+		self.branch = branch
+		self.database = database
+		self.version = None
+		self.refresh()
+	
+	def __repr__(self):
+		return f"<{self.__class__.__name__} of {self.branch.__name__} with {len(self.nodes)} nodes>"
+
+	def __len__(self):
+		self.refresh()
+		return len(self.nodes)
+
+	def __contains__(self, node : Any):
+		self.refresh()
+		return node in self.positions
+	
+	def __getitem__(self, node : Any) -> "IndexedBranch":
+		if node not in self:
+			raise KeyError(node)
+		return IndexedBranch.of(self.branch)(self, node)
+
+	@property
+	def changes(self) -> int:
+		return self.database._connection.tableChanges.get(self.branch.table.__sql_name__.lower(), 0)
+
+	def refresh(self) -> bool:
+		"""Reloads the tree if its table has changed since it was loaded. Returns whether it was reloaded."""
+		changes = self.changes
+		if changes == self.version:
+			return False
+		self.load()
+		self.version = changes
+		return True
+
+	def load(self):
+		table, parent, child = self.branch.names()
+		edges = list(self.database(f"SELECT {parent}, {child} FROM {table}"))
+		nodes = list(dict.fromkeys(itertools.chain.from_iterable((c, ) if p is None else (p, c) for p, c in edges)))
+		positions = {node:i for i, node in enumerate(nodes)}
+		n = len(nodes)
+
+		parents = array("l", [-1]) * n
+		for p, c in edges:
+			if p is not None and p != c:
+				parents[positions[c]] = positions[p]
+		
+		counts = [0] * (n + 1)
+		for p in parents:
+			if p >= 0:
+				counts[p + 1] += 1
+		childOffsets = array("l", itertools.accumulate(counts))
+		childIndices = array("l", [0]) * childOffsets[-1]
+		fill = list(childOffsets[:-1])
+		for i, p in enumerate(parents):
+			if p >= 0:
+				childIndices[fill[p]] = i
+				fill[p] += 1
+		
+		depths = array("l", [-1]) * n
+		roots = array("l", [-1]) * n
+		first = array("l", [-1]) * n
+		euler = array("l")
+		for root in range(n):
+			if parents[root] >= 0:
+				continue
+			depths[root] = 0
+			roots[root] = root
+			first[root] = len(euler)
+			euler.append(root)
+			stack = [[root, childOffsets[root]]]
+			while stack:
+				top = stack[-1]
+				if top[1] < childOffsets[top[0] + 1]:
+					node = childIndices[top[1]]
+					top[1] += 1
+					depths[node] = depths[top[0]] + 1
+					roots[node] = root
+					first[node] = len(euler)
+					euler.append(node)
+					stack.append([node, childOffsets[node]])
+				else:
+					stack.pop()
+					if stack:
+						euler.append(stack[-1][0])
+		
+		sparse = [euler]
+		while 1 << len(sparse) <= len(euler):
+			prev, half = sparse[-1], 1 << (len(sparse) - 1)
+			sparse.append(array("l", (a if depths[a] <= depths[b] else b for a, b in zip(prev, prev[half:]))))
+		
+		self.nodes, self.positions, self.parents, self.depths, self.roots = nodes, positions, parents, depths, roots
+		self.childOffsets, self.childIndices, self.euler, self.first, self.sparse = childOffsets, childIndices, euler, first, sparse
+
+	def parent(self, node : Any) -> Any|None:
+		self.refresh()
+		p = self.parents[self.positions[node]]
+		return None if p < 0 else self.nodes[p]
+	
+	def children(self, node : Any) -> list[Any]:
+		self.refresh()
+		i = self.positions[node]
+		return [self.nodes[c] for c in self.childIndices[self.childOffsets[i]:self.childOffsets[i+1]]]
+	
+	def depth(self, node : Any) -> int:
+		"""Number of steps from the root down to the node, or -1 if the node isn't connected to a root (Which happens if
+		its ancestors form a cycle)."""
+		self.refresh()
+		return self.depths[self.positions[node]]
+
+	def lca(self, a : Any, b : Any) -> Any|None:
+		"""The lowest common ancestor of two nodes, or None if they are in different trees."""
+		self.refresh()
+		i, j = self.positions[a], self.positions[b]
+		if self.roots[i] < 0 or self.roots[i] != self.roots[j]:
+			return None
+		left, right = sorted((self.first[i], self.first[j]))
+		k = (right - left + 1).bit_length() - 1
+		x, y = self.sparse[k][left], self.sparse[k][right - (1 << k) + 1]
+		return self.nodes[x if self.depths[x] <= self.depths[y] else y]
+	
+	def ancestors(self, node : Any) -> list[Any]:
+		self.refresh()
+		out = []
+		p = self.parents[self.positions[node]]
+		while p >= 0 and len(out) < len(self.nodes):
+			out.append(self.nodes[p])
+			p = self.parents[p]
+		return out
+	
+	def descendants(self, node : Any, maxDepth : int=None) -> Generator[tuple[Any,int],None,None]:
+		self.refresh()
+		frontier, depth = [self.positions[node]], 0
+		offsets, indices, nodes = self.childOffsets, self.childIndices, self.nodes
+		while frontier and (maxDepth is None or depth < maxDepth):
+			depth += 1
+			frontier = [c for i in frontier for c in indices[offsets[i]:offsets[i+1]]]
+			for c in frontier:
+				yield nodes[c], depth
+
+	def path(self, a : Any, b : Any) -> list[Any]:
+		"""The nodes from `a` up to the lowest common ancestor and down to `b`. Empty if they are in different trees."""
+		top = self.lca(a, b)
+		if top is None:
+			return []
+		up, down = [a], [b]
+		while up[-1] != top:
+			up.append(self.parent(up[-1]))
+		while down[-1] != top:
+			down.append(self.parent(down[-1]))
+		return up + down[-2::-1]
+
+class IndexedBranch(Branch):
+	"""A `Branch` that answers from a `TreeIndex` instead of querying the database. Nodes are served as instances of
+	a subclass of both this class and the indexed `Branch` class (See `of`), so they keep the attributes and type of the
+	indexed class."""
+
+	index : TreeIndex
+
+	def __init__(self, index : TreeIndex, node : Any):
+		self.index = index
+		self.database = index.database
+		self.node = node
+	
+	@classmethod
+	def of(cls, branch : type[Branch]) -> type["IndexedBranch"]:
+		"""The indexed counterpart of the given `Branch` class, created the first time it is asked for."""
+		if (indexed := branch.__dict__.get("_indexed")) is None:
+			indexed = type(f"Indexed{branch.__name__}", (cls, branch), {})
+			branch._indexed = indexed
+		return indexed
+	
+	@property
+	def parent(self) -> Union["IndexedBranch", None]:
+		p = self.index.parent(self.node)
+		return None if p is None else self.__class__(self.index, p)
+
+	@property
+	def children(self) -> Generator["IndexedBranch",None,None]:
+		for node in self.index.children(self.node):
+			yield self.__class__(self.index, node)
+	
+	@property
+	def depth(self) -> int:
+		return self.index.depth(self.node)
+
+	def descendants(self, maxDepth : int=None) -> Generator[tuple["IndexedBranch",int],None,None]:
+		for node, depth in self.index.descendants(self.node, maxDepth):
+			yield self.__class__(self.index, node), depth
+	
+	def ancestors(self) -> Generator[tuple["IndexedBranch",int],None,None]:
+		for depth, node in enumerate(self.index.ancestors(self.node), start=1):
+			yield self.__class__(self.index, node), depth
+	
+	def path(self, to : Union["Branch",Any]) -> Generator[tuple["IndexedBranch",int],None,None]:
+		for step, node in enumerate(self.index.path(self.node, to.node if isinstance(to, Branch) else to)):
+			yield self.__class__(self.index, node), step
+	
+	def lca(self, other : Union["Branch",Any]) -> Union["IndexedBranch", None]:
+		node = self.index.lca(self.node, other.node if isinstance(other, Branch) else other)
+		return None if node is None else self.__class__(self.index, node)
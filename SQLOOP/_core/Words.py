@@ -5,7 +5,7 @@ from typing import overload, final, Any
 __all__ = ("BEGIN", "ROLLBACK", "IN", "TRANSACTION", "COMMIT", "CONSTRAINT", "CHECK", "PRAGMA", "VALUES", "UPDATE",
 		   "SET", "UNIQUE", "SELECT", "FROM", "WHERE", "ASC", "DESC", "ORDER", "BY", "LIMIT", "CREATE", "ALTER",
 		   "DELETE", "AND", "RENAME", "DROP", "TO", "INDEX", "TABLE", "TRIGGER", "VIEW", "IF", "NOT", "IS", "PRIMARY",
-		   "FOREIGN", "EXISTS", "INSERT", "INTO", "NULL", "KEY", "OR", "REPLACE", "REFERENCES")
+		   "FOREIGN", "EXISTS", "INSERT", "INTO", "NULL", "KEY", "OR", "REPLACE", "REFERENCES", "ANALYZE")
 
 class Comparators(Word):
 	@final
@@ -17,6 +17,7 @@ class ROLLBACK(Word): pass
 class IN(EnclosedWord, Comparators): pass
 class TRANSACTION(Word): pass
 class COMMIT(Word): pass
+class ANALYZE(Word): pass
 class CONSTRAINT(Word): pass
 class CHECK(Word): pass
 class PRAGMA(Word, metaclass=PragmaMeta):
@@ -1,15 +1,18 @@
 
 
+from SQLOOP._core.Advisor import IndexAdvisor, IndexProposal
 from SQLOOP._core.Aggregates import Aggregate, AVG, COUNT, MAX, MIN, SUM, TOTAL, GROUP_CONCAT, STRING_AGG
-from SQLOOP._core.Databases import Database
+from SQLOOP._core.Databases import Database, PreparedQuery, Blob
+from SQLOOP._core.AsyncDatabases import AsyncDatabase, AsyncFetcher
 from SQLOOP._core.Exceptions import Assertion
 from SQLOOP._core.Functions import (ImpossiblePathing, LimitDict, forceHash, CacheMeta, AnyCache, isType, pluralize,
 									formatType, recursiveWalk, hashQuery, hashSQL, correctDatabase, verifyDatabase,
-									getSmallestFootprint, recursiveSubquery, subqueryPaths, createSubqueries)
+									JoinGraph, getSmallestFootprint, recursiveSubquery, subqueryPaths, createSubqueries)
 from SQLOOP._core.Schema import SQLITE_MASTER, ALL
-from SQLOOP._core.Structures import Table, Column, Index
+from SQLOOP._core.Statistics import QueryStats, Histogram, SlowQueryLog, fingerprint
+from SQLOOP._core.Structures import Table, Column, Index, Placeholder
 from SQLOOP._core.ThreadConnection import ThreadConnection
-from SQLOOP._core.Tree import Branch
+from SQLOOP._core.Tree import Branch, TreeIndex
 from SQLOOP._core.Types import *
 from SQLOOP._core.Words import *
 from SQLOOP.Globals import SQLOOP, first, sql, SQLDict
@@ -0,0 +1,363 @@
+"""Benchmarks of the query builder, the join planner, the fetch path and tree traversal, run against synthetic
+databases, and of the memory held by built queries. Results are written as JSON and can be compared against the
+results of an earlier run.
+```sh
+python benchmarks/bench.py --sizes 1e3 1e5 --output results.json
+python benchmarks/bench.py --sizes 1e3 1e5 --baseline results.json
+```
+Timings are only comparable between runs on the same machine, so results are only compared against a baseline when
+one is given. `benchmarks/baseline.json` holds the results of a run with the default arguments (sizes 1e3 to 1e5) on
+the machine described in its `meta`, for reference. To compare against a baseline of your own, including the larger
+sizes, record it first on the machine the comparison is made on:
+```sh
+python benchmarks/bench.py --sizes 1e3 1e5 1e7 --directory databases --output baseline.json
+python benchmarks/bench.py --sizes 1e3 1e5 1e7 --directory databases --baseline baseline.json
+```
+"""
+
+import argparse, gc, json, os, platform, random, re, sqlite3, statistics, sys, tempfile, time, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SQLOOP.core import Column, Table, Index, Database, Branch, SELECT, FROM, WHERE, LIMIT
+
+BENCHMARKS = {}
+MEMORY_BENCHMARKS = {}
+
+def benchmark(name : str, memory : bool=False):
+	"""Registers a benchmark. Benchmarks are given the `Schema` and the opened database and return the function to time
+	and the number of operations it performs per call, optionally followed by a function that is called, untimed, before
+	every call of the timed function. Memory benchmarks instead return a function which returns the objects whose memory
+	is measured."""
+	def register(func):
+		(MEMORY_BENCHMARKS if memory else BENCHMARKS)[name] = func
+		return func
+	return register
+
+class Schema:
+	"""A chain of `depth` tables, each holding a key, the key of the next table in the chain and `width` value columns,
+	plus a table of (parent, child) edges of a random tree and an unrelated table for timing inserts."""
+
+	def __init__(self, width : int, depth : int, size : int):
+		self.width = width
+		self.depth = depth
+		self.size = size
+		self.keys = [self.column(f"key{i}", int) for i in range(depth + 1)]
+		self.values = [[self.column(f"value{i}_{j}", str) for j in range(width)] for i in range(depth)]
+		self.tables = []
+		for i in range(depth):
+			columns = [self.keys[i], self.keys[i+1], *self.values[i]]
+			self.tables.append(type(Table)(f"Table{i}", (Table,), {chr(ord("A") + j):column for j, column in enumerate(columns)}, name=f"table{i}"))
+		self.parent = self.column("parent_node", int)
+		self.child = self.column("child_node", int)
+		self.edges = type(Table)("Edges", (Table,), {"A" : self.parent, "B" : self.child}, name="edges")
+		columns = [self.column("insert_key", int), *(self.column(f"insert_value{j}", str) for j in range(width))]
+		self.inserts = type(Table)("Inserts", (Table,), {chr(ord("A") + j):column for j, column in enumerate(columns)}, name="inserts")
+		attributes = {f"T{i}":table for i, table in enumerate(self.tables)}
+		attributes["E"] = self.edges
+		attributes["I"] = self.inserts
+		self.database = type(Database)(f"BenchmarkDatabase{width}x{depth}", (Database,), attributes)
+		self.node = type(Branch)("Node", (Branch,), {"table" : self.edges, "parentCol" : self.parent, "childCol" : self.child})
+
+	@staticmethod
+	def column(name : str, type : type) -> type[Column]:
+		return Column.__class__(name, (Column,), {}, type=type, name=name)
+
+	def rows(self, i : int, start : int=0, stop : int=None):
+		for r in range(start, self.size if stop is None else stop):
+			yield (r, r, *(f"{i}:{j}:{r}" for j in range(self.width)))
+
+	def edgeRows(self, seed : int=0):
+		rng = random.Random(seed)
+		yield (0, 0)
+		for r in range(1, self.size):
+			yield (rng.randrange(max(r // 2, 1), r) if r > 1 else 0, r)
+
+	def open(self, directory : str) -> Database:
+		"""Creates and fills the database in `directory`, or opens it if it was already created by an earlier run."""
+		filename = os.path.join(directory, f"benchmark_{self.width}x{self.depth}_{self.size}.db")
+		exists = os.path.exists(filename)
+		database = self.database(filename, "w")
+		if not exists:
+			database.fix()
+			with database.bulkLoad():
+				for i, table in enumerate(self.tables):
+					database.insertMany(table, self.rows(i), batchSize=10000)
+				database.insertMany(self.edges, self.edgeRows(), batchSize=10000)
+			database.createIndex(type(Index)("EdgesChildIndex", (Index,), {"table" : self.edges, "A" : self.child}))
+			database.createIndex(type(Index)("EdgesParentIndex", (Index,), {"table" : self.edges, "A" : self.parent}))
+			for table, key in zip(self.tables, self.keys):
+				database.createIndex(type(Index)(f"{table.__name__}KeyIndex", (Index,), {"table" : table, "A" : key}))
+		return database
+
+@benchmark("build")
+def buildQuery(schema : Schema, database : Database):
+	key, value = schema.keys[0], schema.values[0][0]
+	def run():
+		for i in range(100):
+			SELECT (value) - FROM (schema.tables[0]) - WHERE (key == i)
+	return run, 100
+
+@benchmark("render")
+def renderQuery(schema : Schema, database : Database):
+	key, value = schema.keys[0], schema.values[0][0]
+	queries = [SELECT (value) - FROM (schema.tables[0]) - WHERE (key == i) for i in range(100)]
+	def run():
+		for query in queries:
+			str(query)
+	return run, 100
+
+@benchmark("compile")
+def compileQuery(schema : Schema, database : Database):
+	key, value = schema.keys[0], schema.values[0][0]
+	def run():
+		for i in range(100):
+			query = SELECT (value) - FROM (schema.tables[0]) - WHERE (key == i, value == str(i)) - LIMIT (10)
+			str(query), query.params, query.params
+	return run, 100
+
+@benchmark("plan")
+def planQuery(schema : Schema, database : Database):
+	items = (schema.values[-1][0], schema.keys[0] == 1)
+	def run():
+		for _ in range(10):
+			database.createQuery(items)
+	return run, 10
+
+@benchmark("lookup")
+def pointLookup(schema : Schema, database : Database):
+	key, value = schema.keys[0], schema.values[0][0]
+	rng = random.Random(1)
+	keys = [rng.randrange(schema.size) for _ in range(200)]
+	def run():
+		for k in keys:
+			for _ in database[value, key == k]:
+				pass
+	return run, len(keys)
+
+@benchmark("join-lookup")
+def joinLookup(schema : Schema, database : Database):
+	key, value = schema.keys[0], schema.values[-1][0]
+	rng = random.Random(2)
+	keys = [rng.randrange(schema.size) for _ in range(50)]
+	def run():
+		for k in keys:
+			for _ in database[value, key == k]:
+				pass
+	return run, len(keys)
+
+@benchmark("execute")
+def rawExecute(schema : Schema, database : Database):
+	statement = f"SELECT {schema.values[0][0]} FROM {schema.tables[0]} WHERE {schema.keys[0]} = ?;"
+	rng = random.Random(3)
+	keys = [rng.randrange(schema.size) for _ in range(200)]
+	def run():
+		for k in keys:
+			database._connection.execute(statement, [k]).fetchall()
+	return run, len(keys)
+
+@benchmark("scan")
+def scan(schema : Schema, database : Database):
+	value, table = schema.values[0][0], schema.tables[0]
+	def run():
+		for _ in database[value, table]:
+			pass
+	return run, schema.size
+
+@benchmark("insert")
+def bulkInsert(schema : Schema, database : Database):
+	count = min(schema.size, 100000)
+	def reset():
+		database(f"DELETE FROM {schema.inserts};")
+		database.commit()
+	def run():
+		database.insertMany(schema.inserts, ((r, *(f"{j}:{r}" for j in range(schema.width))) for r in range(count)), batchSize=10000)
+	return run, count, reset
+
+@benchmark("tree-ancestors")
+def treeAncestors(schema : Schema, database : Database):
+	rng = random.Random(4)
+	nodes = [schema.node(database, rng.randrange(schema.size)) for _ in range(20)]
+	def run():
+		for node in nodes:
+			for _ in node.ancestors():
+				pass
+	return run, len(nodes)
+
+@benchmark("tree-descendants")
+def treeDescendants(schema : Schema, database : Database):
+	root = schema.node(database, 0)
+	def run():
+		for _ in root.descendants(maxDepth=4):
+			pass
+	return run, 1
+
+@benchmark("tree-index")
+def treeIndex(schema : Schema, database : Database):
+	def run():
+		schema.node.index(database)
+	return run, 1
+
+@benchmark("tree-lca")
+def treeLCA(schema : Schema, database : Database):
+	index = schema.node.index(database)
+	rng = random.Random(5)
+	pairs = [(rng.randrange(schema.size), rng.randrange(schema.size)) for _ in range(1000)]
+	def run():
+		for a, b in pairs:
+			index.lca(a, b)
+	return run, len(pairs)
+
+@benchmark("memory-build", memory=True)
+def buildMemory(schema : Schema, database : Database):
+	keys, values, table = schema.keys, schema.values[0], schema.tables[0]
+	def build():
+		return [SELECT (values[0], values[-1]) - FROM (table) - WHERE (keys[0] == i, values[-1] == str(i)) - LIMIT (10) for i in range(1000)]
+	return build, 1000
+
+@benchmark("memory-render", memory=True)
+def renderMemory(schema : Schema, database : Database):
+	keys, values, table = schema.keys, schema.values[0], schema.tables[0]
+	def build():
+		queries = [SELECT (values[0], values[-1]) - FROM (table) - WHERE (keys[0] == i, values[-1] == str(i)) - LIMIT (10) for i in range(1000)]
+		for query in queries:
+			str(query), query.params
+		return queries
+	return build, 1000
+
+@benchmark("memory-plan", memory=True)
+def planMemory(schema : Schema, database : Database):
+	value, key = schema.values[-1][0], schema.keys[0]
+	def build():
+		return [database.createQuery((value, key == i)) for i in range(100)]
+	return build, 100
+
+def measureMemory(build, operations : int) -> dict[str,float]:
+	"""Memory held by the objects returned by `build` and the peak memory while building them, per operation. Blocks
+	are the number of separately allocated objects that are held."""
+	build() # Warm up caches
+	gc.collect()
+	gc.disable()
+	try:
+		blocks = sys.getallocatedblocks()
+		tracemalloc.start()
+		kept = build()
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		held = sys.getallocatedblocks() - blocks
+	finally:
+		gc.enable()
+	del kept
+	return {
+		"operations" : operations,
+		"blocks" : held / operations,
+		"bytes" : current / operations,
+		"peak" : peak / operations
+	}
+
+def measure(run, operations : int, repeat : int, reset=None) -> dict[str,float]:
+	times = []
+	for _ in range(repeat):
+		if reset is not None:
+			reset()
+		start = time.perf_counter()
+		run()
+		times.append(time.perf_counter() - start)
+	return {
+		"operations" : operations,
+		"repeat" : repeat,
+		"best" : min(times) / operations,
+		"median" : statistics.median(times) / operations,
+		"total" : sum(times)
+	}
+
+def runAll(sizes : list[int], width : int, depth : int, repeat : int, only : str, directory : str, log=print) -> dict:
+	results = {}
+	pattern = re.compile(only) if only else None
+	for size in sizes:
+		schema = Schema(width, depth, size)
+		start = time.perf_counter()
+		database = schema.open(directory)
+		log(f"Opened {size} rows in {time.perf_counter() - start:.2f} s")
+		try:
+			for name, setup in BENCHMARKS.items():
+				if pattern is not None and not pattern.search(name):
+					continue
+				run, operations, *reset = setup(schema, database)
+				reset = reset[0] if reset else None
+				if reset is not None:
+					reset()
+				run() # Warm up caches
+				results[f"{name}[{size}]"] = result = measure(run, operations, repeat, reset)
+				log(f"{name:>18}[{size}]: {result['median'] * 1e6:12.2f} us/op (best {result['best'] * 1e6:.2f})")
+			for name, setup in MEMORY_BENCHMARKS.items():
+				if pattern is not None and not pattern.search(name):
+					continue
+				build, operations = setup(schema, database)
+				results[f"{name}[{size}]"] = result = measureMemory(build, operations)
+				log(f"{name:>18}[{size}]: {result['bytes']:12.0f} B/op in {result['blocks']:.1f} blocks (peak {result['peak']:.0f} B)")
+		finally:
+			database.close()
+	return results
+
+def compare(results : dict, baseline : dict, tolerance : float, log=print) -> list[str]:
+	"""Logs the change of every benchmark from the baseline and returns the names of those that are more than
+	`tolerance` slower, or hold more than `tolerance` more memory."""
+	regressions = []
+	for name, result in results.items():
+		if name not in baseline:
+			continue
+		metric = "best" if "best" in result else "bytes"
+		ratio = result[metric] / baseline[name][metric]
+		flag = ""
+		if ratio > 1 + tolerance:
+			regressions.append(name)
+			flag = "  REGRESSION"
+		elif ratio < 1 / (1 + tolerance):
+			flag = "  improved"
+		log(f"{name:>28}: {ratio:6.2f}x{flag}")
+	return regressions
+
+def main(argv : list[str]=None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--sizes", nargs="+", type=lambda s:int(float(s)), default=[1000, 10000, 100000], help="Number of rows in each table, e.g. 1e3 1e7")
+	parser.add_argument("--width", type=int, default=4, help="Number of value columns per table")
+	parser.add_argument("--depth", type=int, default=3, help="Number of tables in the chain of joins")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--only", help="Regex of benchmark names to run")
+	parser.add_argument("--directory", help="Where the databases are created, and reused between runs. A temporary directory if not given")
+	parser.add_argument("--output", help="File to write the results to as JSON")
+	parser.add_argument("--baseline", help="JSON results of an earlier run on the same machine to compare against")
+	parser.add_argument("--tolerance", type=float, default=0.1, help="Slowdown or growth in memory relative to the baseline counted as a regression")
+	args = parser.parse_args(argv)
+
+	with tempfile.TemporaryDirectory() as temporary:
+		results = runAll(args.sizes, args.width, args.depth, args.repeat, args.only, args.directory or temporary)
+
+	report = {
+		"meta" : {
+			"time" : time.time(),
+			"python" : platform.python_version(),
+			"sqlite" : sqlite3.sqlite_version,
+			"platform" : platform.platform(),
+			"width" : args.width,
+			"depth" : args.depth,
+			"sizes" : args.sizes
+		},
+		"results" : results
+	}
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(report, f, indent=2)
+	if args.baseline:
+		with open(args.baseline) as f:
+			baseline = json.load(f)
+		host = {key : report["meta"][key] for key in ("python", "sqlite", "platform")}
+		if any(baseline["meta"].get(key) != value for key, value in host.items()):
+			print(f"Warning: the baseline was recorded on another host ({', '.join(str(baseline['meta'].get(key)) for key in host)}), timings may not be comparable", file=sys.stderr)
+		if compare(results, baseline["results"], args.tolerance):
+			return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -56,6 +56,38 @@ def test_words():
 	assert str(query1) == "SELECT id, name FROM my_table WHERE id < ? AND name == ?", f'{str(query1)=} == {"SELECT (id, name) FROM my_table WHERE id < ? AND name == ?"=}'
 	assert str(query2) == "SELECT id, name FROM my_table WHERE id < ? AND name == ?", f'{str(query2)=} == {"SELECT (id, name) FROM my_table WHERE id < ? AND name == ?"=}'
 
+def test_singlets():
+
+	from SQLOOP.core import Column, Table, VARCHAR
+
+	class Key(Column, type=int): pass
+	class Label(Column, type=VARCHAR(20)): pass
+
+	class LabelsTable(Table):
+		A = Key
+		B = Label
+
+		constraints = (
+			PRIMARY - KEY (Key),
+		)
+	
+	assert (SELECT (Label) - FROM (LabelsTable) - WHERE (Key == 1)).singlet
+	assert not (SELECT (Label) - FROM (LabelsTable) - WHERE (Key >= 1)).singlet
+	assert not (SELECT (Label) - FROM (LabelsTable) - WHERE (Key < Placeholder("high"))).singlet
+	assert not (SELECT (Label) - FROM (LabelsTable) - WHERE (Label == "label1")).singlet
+
+def test_string_values():
+
+	from SQLOOP.Globals import SQLTuple
+
+	values = SQLTuple(("label1", b"blob", 3))
+	assert str(values) == "(?, ?, ?)"
+	assert list(values.params) == ["label1", b"blob", 3]
+
+	nested = SQLTuple((1, ("label1", "label2")))
+	assert str(nested) == "(?, (?, ?))"
+	assert list(nested.params) == [1, "label1", "label2"]
+
 def test_database():
 
 	from SQLOOP.core import Column, Table, VARCHAR, CHAR
@@ -145,4 +177,933 @@ def test_database():
 	assert set(database[PN, NamesTable]) == {2,1}
 	assert set(database[Name, NamesTable]) == {"Brunhilda Brunson", "Eddrik Reensen"}
 	assert set(database[ALL, PhoneBookTable, Name == "Eddrik Reensen"]) == {(1, "+46731234567", "Råttgränd 90"), (1, "+46733025383", "Klintvägen 69")}
-	assert database[Name, NamesTable, PN == 1] == "Eddrik Reensen"
\ No newline at end of file
+	assert database[Name, NamesTable, PN == 1] == "Eddrik Reensen"
+	assert database[Name, NamesTable, PN == 2] == "Brunhilda Brunson"
+	assert len(MyDatabase.plans) > 0
+	assert set(database[PN, NamesTable, Name - IN("Eddrik Reensen", "Brunhilda Brunson")]) == {1, 2}
+	assert set(database[PN, NamesTable, Name - IN("Eddrik Reensen", "Nobody")]) == {1}
+
+def test_reader_pool(tmp_path):
+
+	from threading import Thread
+	from SQLOOP.core import Column, Table
+
+	class Number(Column, type=int): pass
+
+	class NumbersTable(Table):
+		A = Number
+
+	class PooledDatabase(Database, readers=3):
+		A = NumbersTable
+
+	database = PooledDatabase(str(tmp_path / "pooled.db"), "w")
+	database.fix()
+	connection = database._connection
+	assert len(connection._readers) == 3 and connection.readQueue is not connection.queue
+	assert connection.execute("PRAGMA journal_mode;").fetchone() == ("wal", )
+
+	counts = []
+	errors = []
+	def read():
+		try:
+			for _ in range(50):
+				counts.append(database(SELECT (COUNT(ALL)) - FROM (NumbersTable)))
+		except Exception as e:
+			errors.append(e)
+	readers = [Thread(target=read) for _ in range(3)]
+	for reader in readers:
+		reader.start()
+	for i in range(200):
+		database(INSERT - INTO - NumbersTable - (Number,) - VALUES - (i,))
+		if i % 20 == 19:
+			database.commit()
+	for reader in readers:
+		reader.join()
+	assert errors == [] and len(counts) == 150
+
+	# Reads see the writer's own uncommitted changes, and committed changes once committed
+	database(INSERT - INTO - NumbersTable - (Number,) - VALUES - (200,))
+	assert database(SELECT (COUNT(ALL)) - FROM (NumbersTable)) == 201
+	database.commit()
+	assert database(SELECT (COUNT(ALL)) - FROM (NumbersTable)) == 201
+	assert database(SELECT (COUNT(ALL)) - FROM (NumbersTable) - WHERE (Number == 200)) == 1
+	database.close()
+
+def test_streaming(tmp_path):
+
+	from SQLOOP.core import Column, Table, ThreadConnection
+
+	class Number(Column, type=int): pass
+
+	class NumbersTable(Table):
+		A = Number
+
+	class NumbersDatabase(Database):
+		A = NumbersTable
+
+	database = NumbersDatabase(str(tmp_path / "numbers.db"), "w")
+	database.fix()
+
+	n = 3 * ThreadConnection.CHUNK_SIZE + 1
+	for i in range(n):
+		database(INSERT - INTO - NumbersTable - (Number,) - VALUES - (i,))
+	database.commit()
+
+	assert sum(database[Number, NumbersTable]) == sum(range(n))
+
+	for number in database[Number, NumbersTable]:
+		break
+	# Abandoned streams must not block the connection
+	assert database(SELECT (COUNT(ALL)) - FROM (NumbersTable)) == n
+	database.close()
+
+def test_abandoned_stream(tmp_path):
+
+	from SQLOOP.core import Column, Table, ThreadConnection
+
+	class Number(Column, type=int): pass
+
+	class NumbersTable(Table):
+		A = Number
+
+	class StreamedDatabase(Database, readers=1):
+		A = NumbersTable
+
+	database = StreamedDatabase(str(tmp_path / "streamed.db"), "w")
+	database.fix()
+
+	n = (ThreadConnection.MAX_CHUNKS + 2) * ThreadConnection.CHUNK_SIZE
+	for i in range(n):
+		database(INSERT - INTO - NumbersTable - (Number,) - VALUES - (i,))
+	database.commit()
+
+	cursor = database(f"SELECT {Number} FROM {NumbersTable};")
+	assert cursor.fetchone() == (0, )
+	del cursor
+	# The reader must let go of the snapshot of the abandoned stream
+	database(INSERT - INTO - NumbersTable - (Number,) - VALUES - (n,))
+	database.commit()
+	assert database(f"SELECT COUNT(*) FROM {NumbersTable};").fetchone() == (n + 1, )
+	database.close()
+
+def test_insert_many(tmp_path):
+
+	import sqlite3
+	from SQLOOP.core import Column, Table, VARCHAR
+
+	class Key(Column, type=int): pass
+	class Label(Column, type=VARCHAR(20)): pass
+
+	class LabelsTable(Table):
+		A = Key
+		B = Label
+
+		constraints = (
+			PRIMARY - KEY (Key),
+		)
+
+	class LabelsDatabase(Database):
+		A = LabelsTable
+
+	database = LabelsDatabase(str(tmp_path / "labels.db"), "w")
+	database.fix()
+
+	assert database.insertMany(LabelsTable, ((i, f"label{i}") for i in range(2500)), batchSize=1000) == 2500
+	assert database(SELECT (COUNT(ALL)) - FROM (LabelsTable)) == 2500
+	assert database[Label, LabelsTable, Key == 1234] == "label1234"
+
+	try:
+		database.insertMany(LabelsTable, [(2500, "new"), (0, "duplicate")])
+		assert False, "Duplicate primary key was inserted"
+	except sqlite3.IntegrityError:
+		pass
+	# The failed batch was rolled back as a whole
+	assert database(SELECT (COUNT(ALL)) - FROM (LabelsTable)) == 2500
+	database.close()
+
+def test_group_commit(tmp_path):
+
+	import sqlite3
+	from threading import Thread, Barrier
+	from SQLOOP.core import Column, Table
+
+	class Key(Column, type=int): pass
+
+	class KeysTable(Table):
+		A = Key
+
+		constraints = (
+			PRIMARY - KEY (Key),
+		)
+
+	class GroupedDatabase(Database, groupCommit=True):
+		A = KeysTable
+		groupCommitDelay = 0.01
+
+	database = GroupedDatabase(str(tmp_path / "grouped.db"), "w")
+	database.fix()
+
+	errors = []
+	barrier = Barrier(8)
+	def write(keys):
+		barrier.wait()
+		for key in keys:
+			try:
+				database(INSERT - INTO - KeysTable - (Key,) - VALUES - (key,))
+			except Exception as e:
+				errors.append((key, e))
+	# The last writer inserts a key that another writer already inserts
+	writers = [Thread(target=write, args=(range(50*i, 50*(i+1)),)) for i in range(7)] + [Thread(target=write, args=([1000, 0],))]
+	for writer in writers:
+		writer.start()
+	for writer in writers:
+		writer.join()
+	
+	# Every statement was committed by the writer without an explicit commit, except the duplicate
+	assert database(SELECT (COUNT(ALL)) - FROM (KeysTable)) == 351
+	# Only the caller of the duplicate got an error, whichever writer came second
+	assert [key for key, _ in errors] == [0] and isinstance(errors[0][1], sqlite3.IntegrityError)
+
+	database.reopen("w")
+	assert database(SELECT (COUNT(ALL)) - FROM (KeysTable)) == 351
+
+	# Statements inside a transaction opened by the user are not committed by the group
+	database("BEGIN;")
+	database(INSERT - INTO - KeysTable - (Key,) - VALUES - (2000,))
+	database("ROLLBACK;")
+	assert database(SELECT (COUNT(ALL)) - FROM (KeysTable)) == 351
+	database.close()
+
+def test_async_database(tmp_path):
+
+	import asyncio
+	from SQLOOP.core import Column, Table, VARCHAR, ThreadConnection
+
+	class Key(Column, type=int): pass
+	class Spelling(Column, type=VARCHAR(20)): pass
+
+	class WordsTable(Table):
+		A = Key
+		B = Spelling
+
+		constraints = (
+			PRIMARY - KEY (Key),
+		)
+
+	class WordsDatabase(Database):
+		A = WordsTable
+
+	async def main():
+		async with AsyncDatabase(WordsDatabase(str(tmp_path / "words.db"), "w")) as database:
+			database.fix()
+			async with database.transaction():
+				for i in range(100):
+					await database(INSERT - INTO - WordsTable - (Key, Spelling) - VALUES - (i, f"word{i}"))
+			
+			assert await database[Spelling, WordsTable, Key == 42] == "word42"
+			plans = len(WordsDatabase.plans)
+			assert await database[Spelling, WordsTable, Key == 7] == "word7"
+			assert len(WordsDatabase.plans) == plans > 0
+			assert [key async for key in database[Key, WordsTable]] == list(range(100))
+			assert len(await database[Key, WordsTable]) == 100
+
+			try:
+				async with database.transaction():
+					await database(INSERT - INTO - WordsTable - (Key, Spelling) - VALUES - (100, "word100"))
+					raise ValueError()
+			except ValueError:
+				pass
+			assert await database(SELECT (COUNT(ALL)) - FROM (WordsTable)) == 100
+
+			database.insertMany(WordsTable, ((i, f"word{i}") for i in range(100, 100 + 3 * ThreadConnection.CHUNK_SIZE)))
+			fetcher = database[Key, WordsTable]
+			async for key in fetcher:
+				break
+			# Leaving the loop early closes the stream, once the event loop has finalized the generator
+			for _ in range(100):
+				if fetcher._cursor.cancelled:
+					break
+				await asyncio.sleep(0.01)
+			assert fetcher._cursor.cancelled and not fetcher._cursor.exhausted
+	
+	asyncio.run(main())
+
+def test_finalizer_close(tmp_path):
+
+	import gc, time
+	from threading import Thread
+	from SQLOOP.core import Column, Table, ThreadConnection
+
+	class Number(Column, type=int): pass
+
+	class NumbersTable(Table):
+		A = Number
+
+	class NumbersDatabase(Database):
+		A = NumbersTable
+
+	database = NumbersDatabase(str(tmp_path / "finalized.db"), "w")
+	database.fix()
+	connection = database._connection
+	
+	def collect():
+		nonlocal database
+		with ThreadConnection.CACHE_LOCK:
+			del database
+			gc.collect()
+	# Garbage collection can finalize a database while the lock is held
+	thread = Thread(target=collect, daemon=True)
+	thread.start()
+	thread.join(5)
+	assert not thread.is_alive(), "Finalizing a database deadlocked"
+
+	for _ in range(500):
+		if not connection.running:
+			break
+		time.sleep(0.01)
+	assert not connection.running
+
+def test_prepare(tmp_path):
+
+	from SQLOOP.core import Column, Table, VARCHAR
+
+	class Key(Column, type=int): pass
+	class Label(Column, type=VARCHAR(20)): pass
+
+	class LabelsTable(Table):
+		A = Key
+		B = Label
+
+		constraints = (
+			PRIMARY - KEY (Key),
+		)
+
+	class LabelsDatabase(Database):
+		A = LabelsTable
+
+	database = LabelsDatabase(str(tmp_path / "prepared.db"), "w")
+	database.fix()
+
+	insert = database.prepare(INSERT - INTO - LabelsTable - (Key, Label) - VALUES - (Placeholder("key"), Placeholder("label")))
+	for i in range(10):
+		insert(key=i, label=f"label{i}")
+	
+	lookup = database.prepare(Label, LabelsTable, Key == Placeholder("key"))
+	assert lookup.sql == str(database.createQuery((Label, LabelsTable, Key == 1)))
+	assert [lookup(key=i) for i in range(10)] == [f"label{i}" for i in range(10)]
+
+	between = database.prepare(SELECT (Key) - FROM (LabelsTable) - WHERE (Key >= Placeholder("low"), Key < Placeholder("high")))
+	assert list(between(low=3, high=6)) == [3, 4, 5]
+	assert len(between(low=0, high=10)) == 10
+
+	try:
+		lookup()
+		assert False, "Missing placeholder value was not noticed"
+	except MissingArgument:
+		pass
+	database.close()
+
+def test_render_cache():
+
+	from SQLOOP._core.Structures import Column, Table, QUERY_CACHE, renderKey
+
+	class ID(Column, name="id"): pass
+
+	class CachedTable(Table, name="cached_table"):
+		class ID(Column): pass
+
+	query1 = SELECT (ID) - FROM (CachedTable) - WHERE (ID == 1)
+	query2 = SELECT (ID) - FROM (CachedTable) - WHERE (ID == 2)
+	query3 = SELECT (ID) - FROM (CachedTable) - WHERE (ID > 2)
+
+	assert renderKey(query1) == renderKey(query2)
+	assert renderKey(query1) != renderKey(query3)
+	assert renderKey(query1).node is query1
+	assert renderKey(SELECT (ID) - FROM (CachedTable)) != renderKey(SELECT (ID) - FROM (CachedTable) - WHERE (ID == 1))
+
+	str(query1)
+	hits = QUERY_CACHE.hits
+	assert str(query2) == "SELECT id FROM cached_table WHERE id == ?"
+	assert QUERY_CACHE.hits == hits + 1
+	assert query2.params == (2,)
+	assert all(word._compiled is None for word in query2.words)
+	# Cached keys only hold the value-free shape of the query they were made from
+	assert all(key.node is None and key.shape is not None for key in QUERY_CACHE._data)
+	assert renderKey(query2).frozen() == renderKey(query1) and renderKey(query3) != renderKey(query1).frozen()
+	assert str(query3) == "SELECT id FROM cached_table WHERE id > ?"
+	assert QUERY_CACHE.stats()["size"] <= QUERY_CACHE.capacity
+
+def test_compact_nodes():
+
+	from SQLOOP._core.Structures import Column, Table, Comparison, SanitizedValue
+
+	class ID(Column, name="id"): pass
+
+	class CompactTable(Table, name="compact_table"):
+		class ID(Column): pass
+
+	base = SELECT (ID) - FROM (CompactTable)
+	query = base - WHERE (ID == 1) - LIMIT (10)
+
+	for node in (query, *query.words, query.words[2].content[0], query.words[3].content[0], COUNT(ID)):
+		assert not hasattr(node, "__dict__"), f"{node!r} has a __dict__"
+	assert all(word is shared for word, shared in zip(query.words, base.words))
+	assert str(query) == "SELECT id FROM compact_table WHERE id == ? LIMIT ?"
+	assert query.params == (1, 10)
+	assert hash(SanitizedValue(1)) == hash(SanitizedValue(1))
+
+def test_compiled_queries():
+
+	from SQLOOP._core.Structures import Column, Table
+
+	class ID(Column, name="id"): pass
+	class Name(Column, name="name"): pass
+
+	class CompiledTable(Table, name="compiled_table"):
+		class ID(Column): pass
+		class Name(Column): pass
+
+	where = WHERE (ID > 1, (ID ^ 2) == 3, Name == "x")
+	query = SELECT (ID, Name) - FROM (CompiledTable) - where - LIMIT (10)
+
+	assert query.compile() == ("SELECT id, name FROM compiled_table WHERE id > ? AND ((id | ?) - (id & ?)) == ? AND name == ? LIMIT ?", (1, 2, 2, 3, "x", 10))
+	assert query.compile() is query.compile()
+	assert where.compile() is where.compile()
+	assert str(VALUES (1, "a")) == "VALUES (?, ?)" and VALUES (1, "a").params == (1, "a")
+	assert str(ID - IN (1, 2)) == "id IN (?, ?)" and (ID - IN (1, 2)).params == (1, 2)
+	assert str(SELECT (ID) - FROM (CompiledTable) - WHERE (ID - IN (SELECT (ID) - FROM (CompiledTable) - WHERE (Name == "y")))) \
+		== "SELECT id FROM compiled_table WHERE id IN (SELECT id FROM compiled_table WHERE name == ?)"
+
+	query.columns = (ID, )
+	assert str(query) == "SELECT id FROM compiled_table WHERE id > ? AND ((id | ?) - (id & ?)) == ? AND name == ? LIMIT ?"
+
+def test_structural_hash():
+
+	from SQLOOP._core.Structures import Column, Table, renderKey, structuralHash
+
+	class ID(Column, name="id"): pass
+
+	class HashedTable(Table, name="hashed_table"):
+		class ID(Column): pass
+
+	base = SELECT (ID) - FROM (HashedTable)
+	query1 = base - WHERE (ID == 1)
+	query2 = base - WHERE (ID == 2)
+	query3 = base - WHERE (ID > 2)
+
+	assert hash(query1) == hash(query2) == structuralHash(query1)
+	assert hash(query1) != hash(query3)
+	assert hash(query1.words[-1]) == hash(query2.words[-1]) != hash(query3.words[-1])
+	assert hash(renderKey(query1)) == hash(query1)
+	assert renderKey(query1) == renderKey(query2) != renderKey(query3)
+
+	query1.words = (*query1.words[:-1], WHERE (ID > 2))
+	assert hash(query1) == hash(query3) and renderKey(query1) == renderKey(query3)
+	assert str(query1) == str(query3) == "SELECT id FROM hashed_table WHERE id > ?"
+
+def test_join_paths():
+
+	from SQLOOP.core import Column, Table
+
+	class A(Column): pass
+	class B(Column): pass
+	class C(Column): pass
+	class D(Column): pass
+	class X(Column): pass
+
+	class Start(Table): a = A; x = X
+	class Link(Table): a = A; b = B
+	class Near(Table): b = B; c = C
+	class Far(Table): c = C; d = D
+
+	class PathsDatabase(Database):
+		A = Start; B = Link; C = Near; D = Far
+
+	graph = PathsDatabase.joinGraph
+	assert graph.path(Start, Far) == (Start, Link, Near, Far)
+	assert graph.joinColumn(Link, Near) is B
+	assert "start -[a]-> link -[b]-> near" in graph.describe()
+
+	subqueries = createSubqueries((Start, ), graph, (C == 1, D == 2))
+	assert len(subqueries) == 2
+	assert str(subqueries[0]) == "a IN (SELECT a FROM link WHERE b IN (SELECT b FROM near WHERE c == ?))"
+	assert str(subqueries[1]) == "a IN (SELECT a FROM link WHERE b IN (SELECT b FROM near WHERE c IN (SELECT c FROM far WHERE d == ?)))"
+
+def test_footprints(tmp_path):
+
+	from SQLOOP.core import Column, Table, VARCHAR
+	from SQLOOP._core.Functions import getSmallestFootprint
+
+	class PID(Column, type=int): pass
+	class Name(Column, type=VARCHAR(20)): pass
+	class Street(Column, type=VARCHAR(20)): pass
+	class CityID(Column, type=int): pass
+	class CityName(Column, type=VARCHAR(20)): pass
+	class CountryID(Column, type=int): pass
+	class CountryName(Column, type=VARCHAR(20)): pass
+	class Number(Column, type=VARCHAR(20)): pass
+	class CompanyID(Column, type=int): pass
+	class CompanyName(Column, type=VARCHAR(20)): pass
+	class Salary(Column, type=int): pass
+	class Remark(Column, type=VARCHAR(20)): pass
+
+	class Person(Table): a = PID; b = Name
+	class Address(Table): a = PID; b = Street; c = CityID
+	class City(Table): a = CityID; b = CityName; c = CountryID
+	class Country(Table): a = CountryID; b = CountryName
+	class Phone(Table): a = PID; b = Number
+	class Employment(Table): a = PID; b = CompanyID; c = Salary
+	class Company(Table): a = CompanyID; b = CompanyName; c = CityID
+	class Note(Table): a = Name; b = Remark
+
+	class WideDatabase(Database):
+		A = Person; B = Address; C = City; D = Country; E = Phone; F = Employment; G = Company; H = Note
+	
+	graph = WideDatabase.joinGraph
+	footprint = lambda *columns:set(getSmallestFootprint(graph, set(columns)))
+	# Where the tables with the columns are neighbours, the footprint is the same as the smallest combination
+	assert footprint(Name, Street) == {Person, Address}
+	assert footprint(Name, Salary) == {Person, Employment}
+	# Where they aren't, the tables needed to join them are included, which a combination of two tables lacked
+	assert footprint(Name, CityName) == {Person, Address, City}
+	assert footprint(CompanyName, CountryName) == {Company, City, Country}
+	assert footprint(Number, CompanyName) == {Phone, Address, Company}
+
+	database = WideDatabase(str(tmp_path / "wide.db"), "w")
+	database.fix()
+	for row in [(1, "Anna"), (2, "Bertil")]:
+		database(INSERT - INTO - Person - (PID, Name) - VALUES - row)
+	for row in [(1, "Storgatan", 10), (2, "Lillgatan", 20)]:
+		database(INSERT - INTO - Address - (PID, Street, CityID) - VALUES - row)
+	for row in [(10, "Lund", 100), (20, "Oslo", 200)]:
+		database(INSERT - INTO - City - (CityID, CityName, CountryID) - VALUES - row)
+	for row in [(100, "Sweden"), (200, "Norway")]:
+		database(INSERT - INTO - Country - (CountryID, CountryName) - VALUES - row)
+	for row in [(1, 5, 300), (2, 6, 400)]:
+		database(INSERT - INTO - Employment - (PID, CompanyID, Salary) - VALUES - row)
+	for row in [(5, "Acme", 20), (6, "Initech", 10)]:
+		database(INSERT - INTO - Company - (CompanyID, CompanyName, CityID) - VALUES - row)
+	
+	assert set(database[Name, Street]) == {("Anna", "Storgatan"), ("Bertil", "Lillgatan")}
+	assert set(database[Name, Salary]) == {("Anna", 300), ("Bertil", 400)}
+	assert set(database[Name, CityName]) == {("Anna", "Lund"), ("Bertil", "Oslo")}
+	assert set(database[CompanyName, CountryName]) == {("Acme", "Norway"), ("Initech", "Sweden")}
+	assert list(database[Name, CountryName == "Norway"]) == ["Bertil"]
+	database.close()
+
+def test_tree_traversal(tmp_path):
+
+	from SQLOOP.core import Column, Table
+
+	class ParentNode(Column, type=int): pass
+	class ChildNode(Column, type=int): pass
+
+	class EdgesTable(Table):
+		A = ParentNode
+		B = ChildNode
+	
+	class TreeDatabase(Database):
+		A = EdgesTable
+	
+	class Node(Branch):
+		table = EdgesTable
+		parentCol = ParentNode
+		childCol = ChildNode
+
+	database = TreeDatabase(str(tmp_path / "tree.db"), "w")
+	database.fix()
+	database.insertMany(EdgesTable, [(1, 1), (1, 2), (1, 3), (2, 4), (2, 5), (4, 6), (3, 7)])
+
+	root = Node(database, 1)
+	assert [(b.node, depth) for b, depth in root.descendants()] == [(2, 1), (3, 1), (4, 2), (5, 2), (7, 2), (6, 3)]
+	assert [(b.node, depth) for b, depth in root.descendants(maxDepth=1)] == [(2, 1), (3, 1)]
+	assert [(b.node, depth) for b, depth in Node(database, 6).ancestors()] == [(4, 1), (2, 2), (1, 3)]
+	assert [b.node for b, _ in Node(database, 6).path(Node(database, 7))] == [6, 4, 2, 1, 3, 7]
+	assert sorted((p.node, c.node) for p, c in Node.childrenOf(database, [2, 3])) == [(2, 4), (2, 5), (3, 7)]
+
+	index = Node.index(database)
+	assert len(index) == 7
+	assert index.parent(6) == 4 and index.parent(1) is None
+	assert index.children(2) == [4, 5]
+	assert index.depth(6) == 3
+	assert index.lca(6, 5) == 2 and index.lca(6, 7) == 1
+	assert [b.node for b, _ in index[6].path(7)] == [6, 4, 2, 1, 3, 7]
+	assert isinstance(index[6], Node) and index[6].table is EdgesTable
+	assert type(index[6].parent) is type(index[6]) and index[6].parent == Node(database, 4)
+
+	database(INSERT - INTO - EdgesTable - (ParentNode, ChildNode) - VALUES - (7, 8))
+	assert index.parent(8) == 7 and index.lca(8, 5) == 1
+
+def test_tree_cycles(tmp_path):
+
+	from SQLOOP.core import Column, Table
+
+	class ParentNode(Column, type=int): pass
+	class ChildNode(Column, type=int): pass
+
+	class EdgesTable(Table):
+		A = ParentNode
+		B = ChildNode
+	
+	class CyclicDatabase(Database):
+		A = EdgesTable
+	
+	class Node(Branch):
+		table = EdgesTable
+		parentCol = ParentNode
+		childCol = ChildNode
+
+	database = CyclicDatabase(str(tmp_path / "cyclic.db"), "w")
+	database.fix()
+	database.insertMany(EdgesTable, [(1, 2), (2, 1), (2, 3)])
+
+	# Cycles end the walk instead of recursing forever
+	assert [(b.node, depth) for b, depth in Node(database, 1).descendants()] == [(2, 1), (3, 2)]
+	assert [(b.node, depth) for b, depth in Node(database, 3).ancestors()] == [(2, 1), (1, 2)]
+	assert [b.node for b, _ in Node(database, 3).path(Node(database, 1))] == [3, 2, 1]
+
+def test_fetch_columns(tmp_path):
+
+	import pytest
+	numpy = pytest.importorskip("numpy")
+
+	from SQLOOP.core import Column, Table, VARCHAR
+
+	class Number(Column, type=int): pass
+	class Half(Column, type=float): pass
+	class Code(Column, type=VARCHAR(8)): pass
+
+	class NumbersTable(Table):
+		A = Number
+		B = Half
+		C = Code
+	
+	class NumbersDatabase(Database):
+		A = NumbersTable
+	
+	database = NumbersDatabase(str(tmp_path / "columns.db"), "w")
+	database.fix()
+	database.insertMany(NumbersTable, [(i, i / 2, f"c{i}") for i in range(3000)])
+
+	arrays = database.fetchColumns(Number, Half, Code, NumbersTable, fixedWidth=True)
+	assert list(arrays) == ["number", "half", "code"]
+	assert arrays["number"].dtype == numpy.int64 and arrays["half"].dtype == numpy.float64 and arrays["code"].dtype == numpy.dtype("U8")
+	assert len(arrays["number"]) == 3000 and arrays["number"].sum() == sum(range(3000))
+	assert list(database.fetchColumns(Half, NumbersTable, Number == 3)["half"]) == [1.5]
+
+	# Values that don't fit the dtype of their column, even in a late chunk, turn the column into objects
+	database.insertMany(NumbersTable, [(2.7, None, "abcdefghij")])
+	arrays = database.fetchColumns(Number, Half, Code, NumbersTable, fixedWidth=True)
+	assert arrays["number"].dtype == arrays["half"].dtype == arrays["code"].dtype == object
+	assert (arrays["number"][-1], arrays["half"][-1], arrays["code"][-1]) == (2.7, None, "abcdefghij")
+	assert len(arrays["code"]) == 3001 and arrays["code"][5] == "c5"
+
+def test_blobs(tmp_path):
+
+	import io, os
+	from SQLOOP.core import Column, Table, BLOB
+
+	class BlobKey(Column, type=int): pass
+	class Payload(Column, type=BLOB): pass
+
+	class PayloadsTable(Table):
+		A = BlobKey
+		B = Payload
+	
+	class PayloadsDatabase(Database):
+		A = PayloadsTable
+	
+	database = PayloadsDatabase(str(tmp_path / "blobs.db"), "w")
+	database.fix()
+	database(INSERT - INTO - PayloadsTable - (BlobKey, Payload) - VALUES - (1, b"hello world"))
+	database.commit()
+
+	with database.openBlob(PayloadsTable.B, 1) as blob:
+		assert len(blob) == 11 and blob[0:5] == b"hello"
+		assert [bytes(view) for view in blob.chunksInto(bytearray(4))] == [b"hell", b"o wo", b"rld"]
+	
+	data = os.urandom(300_000)
+	assert database.writeBlob(PayloadsTable.B, 1, io.BytesIO(data)) == len(data)
+	database.commit()
+	with database.openBlob(PayloadsTable.B, 1) as blob:
+		assert b"".join(blob.chunks(1 << 16)) == data
+
+def test_read_only_modes(tmp_path):
+
+	import sqlite3, pytest
+	from SQLOOP.core import Column, Table
+
+	class Number(Column, type=int): pass
+
+	class NumbersTable(Table):
+		A = Number
+	
+	class ReferenceDatabase(Database, mmapSize=1 << 24):
+		A = NumbersTable
+	
+	filename = str(tmp_path / "reference.db")
+	database = ReferenceDatabase(filename, "w")
+	database.fix()
+	database.insertMany(NumbersTable, [(i, ) for i in range(10)])
+	database.close()
+
+	for mode in ("r", "ri"):
+		database = ReferenceDatabase(filename, mode)
+		assert sum(database[Number, NumbersTable]) == 45
+		assert database._connection.execute("PRAGMA mmap_size;").fetchone() == (1 << 24, )
+		with pytest.raises(sqlite3.OperationalError):
+			database(INSERT - INTO - NumbersTable - (Number, ) - VALUES - (10, ))
+		database.close()
+
+def test_pragma_profiles(tmp_path):
+
+	from SQLOOP.core import Column, Table
+
+	class Number(Column, type=int): pass
+
+	class NumbersTable(Table):
+		A = Number
+	
+	class TunedDatabase(Database, profile="durable", pragmas={"cache_size" : -4096}):
+		A = NumbersTable
+	
+	pragma = lambda name:database._connection.execute(f"PRAGMA {name};").fetchone()[0]
+
+	database = TunedDatabase(str(tmp_path / "tuned.db"), "w")
+	assert (pragma("synchronous"), pragma("cache_size"), pragma("journal_mode")) == (2, -4096, "wal")
+
+	database.setProfile("bulk-load")
+	assert (pragma("synchronous"), pragma("cache_size"), pragma("journal_mode")) == (0, -4096, "memory")
+
+	# Pragmas left out by the new profile are set back to what they were before any profile was applied
+	database.setProfile(None)
+	assert (pragma("synchronous"), pragma("cache_size"), pragma("journal_mode"), pragma("temp_store")) == (2, -4096, "delete", 0)
+
+	database.setProfile("bulk-load")
+	database.reopen("w")
+	assert database.profile == "bulk-load" and pragma("synchronous") == 0
+	database.close()
+
+def test_bulk_load(tmp_path):
+
+	import pytest
+	from SQLOOP.core import Column, Table, Index, SQLITE_MASTER
+	from SQLOOP._core.Schema import NAME
+
+	class Key(Column, type=int): pass
+	class Bucket(Column, type=int): pass
+
+	class LoadTable(Table):
+		A = Key
+		B = Bucket
+	
+	class BucketIndex(Index):
+		table = LoadTable
+		B = Bucket
+	
+	class LoadDatabase(Database, profile="durable"):
+		A = LoadTable
+		B = BucketIndex
+	
+	database = LoadDatabase(str(tmp_path / "load.db"), "w")
+	database.fix()
+	indexes = lambda:list(database(SELECT (NAME) - FROM (SQLITE_MASTER) - WHERE (type="index")))
+	assert indexes() == [str(BucketIndex)]
+
+	with database.bulkLoad():
+		assert indexes() == []
+		assert database._connection.execute("PRAGMA synchronous;").fetchone() == (0, )
+		database.insertMany(LoadTable, ((i, i % 7) for i in range(10000)))
+	
+	assert indexes() == [str(BucketIndex)]
+	assert database._connection.execute("PRAGMA synchronous;").fetchone() == (2, )
+	assert list(database("SELECT tbl FROM sqlite_stat1;")) == [(str(LoadTable), )]
+
+	with pytest.raises(RuntimeError):
+		with database.bulkLoad():
+			database.insertMany(LoadTable, [(i, 0) for i in range(10)])
+			raise RuntimeError()
+	assert indexes() == [str(BucketIndex)]
+	assert database(SELECT (COUNT (ALL)) - FROM (LoadTable)) == 10000
+	database.close()
+
+	class DefaultDatabase(Database):
+		A = LoadTable
+	
+	database = DefaultDatabase(str(tmp_path / "default.db"), "w")
+	database.fix()
+	pragmas = lambda:tuple(database._connection.execute(f"PRAGMA {name};").fetchone()[0] for name in ("synchronous", "journal_mode", "cache_size"))
+	before = pragmas()
+	with database.bulkLoad():
+		assert pragmas() == (0, "memory", -262144)
+		database.insertMany(LoadTable, [(i, 0) for i in range(10)])
+	assert pragmas() == before == (2, "delete", -2000)
+	database.close()
+
+def test_analyze(tmp_path):
+
+	import time
+	from SQLOOP.core import Column, Table, Index
+
+	class Key(Column, type=int): pass
+	class Bucket(Column, type=int): pass
+
+	class StatsTable(Table):
+		A = Key
+		B = Bucket
+	
+	class BucketIndex(Index):
+		table = StatsTable
+		B = Bucket
+
+	class StatsDatabase(Database, analyzeThreshold=1000, optimizeOnClose=True):
+		A = StatsTable
+		B = BucketIndex
+	
+	database = StatsDatabase(str(tmp_path / "stats.db"), "w")
+	database.fix()
+	database.insertMany(StatsTable, [(i, i % 5) for i in range(500)])
+	assert database.lastAnalyzed == {}
+
+	database.insertMany(StatsTable, [(i, i % 5) for i in range(500, 1100)])
+	for _ in range(100):
+		if database.lastAnalyzed:
+			break
+		time.sleep(0.01)
+	assert set(database.lastAnalyzed) == {str(StatsTable)}
+	assert list(database("SELECT stat FROM sqlite_stat1;")) == [("1100 220", )]
+
+	before = database.lastAnalyzed[str(StatsTable)]
+	database.analyze(StatsTable)
+	assert database.lastAnalyzed[str(StatsTable)] >= before
+	database.close()
+
+def test_query_stats(tmp_path):
+
+	from SQLOOP.core import Column, Table
+	from SQLOOP._core.Statistics import fingerprint, Histogram
+
+	assert fingerprint("SELECT a FROM t WHERE b = 'x''y' AND c IN (1, 2, 3);") == fingerprint("SELECT a  FROM t WHERE b = 'z' AND c IN (4);")
+
+	histogram = Histogram()
+	for i in range(1, 101):
+		histogram.add(i / 1000)
+	assert histogram.count == 100
+	assert 0.045 <= histogram.percentile(50) <= 0.06
+	assert 0.09 <= histogram.percentile(99) <= 0.1
+
+	class Key(Column, type=int): pass
+	class Label(Column, type=str): pass
+
+	class LabelTable(Table):
+		A = Key
+		B = Label
+
+	class LabelDatabase(Database):
+		A = LabelTable
+	
+	database = LabelDatabase(str(tmp_path / "labels.db"), "w")
+	database.fix()
+	database.insertMany(LabelTable, [(i, str(i)) for i in range(100)])
+	database.resetStats()
+	for i in range(10):
+		assert list(database[Label, Key == i]) == [str(i)]
+	assert len(list(database[Key, LabelTable])) == 100
+	
+	stats = database.stats()
+	lookup = next(phases for sql, phases in stats["queries"].items() if "WHERE" in sql)
+	assert set(lookup) == {"build", "wait", "execute", "fetch"}
+	assert lookup["execute"]["count"] == 10
+	assert lookup["execute"]["p50"] <= lookup["execute"]["p99"] <= lookup["execute"]["max"]
+	assert stats["queueDepth"]["max"] >= 1
+	assert stats["busy"]["workers"] == 0
+
+	# Queries built by the caller have no build phase
+	database(SELECT (Label) - FROM (LabelTable) - WHERE (Key == 1) - ORDER - BY (Label))
+	phases = next(phases for sql, phases in database.stats()["queries"].items() if "ORDER BY" in sql)
+	assert "build" not in phases and "execute" in phases
+	assert fingerprint.cache_info().maxsize is not None
+
+	database.resetStats()
+	assert database.stats()["queries"] == {}
+	database.close()
+
+def test_slow_query_log(tmp_path):
+
+	import json
+	from SQLOOP.core import Column, Table
+
+	class Key(Column, type=int): pass
+	class Label(Column, type=str): pass
+
+	class SlowTable(Table):
+		A = Key
+		B = Label
+
+	class SlowDatabase(Database):
+		A = SlowTable
+	
+	database = SlowDatabase(str(tmp_path / "slow.db"), "w")
+	database.fix()
+	database.insertMany(SlowTable, [(i, str(i)) for i in range(100)])
+
+	log = database.logSlowQueries(0.0, filename=str(tmp_path / "slow.jsonl"), redact=True)
+	assert list(database[Label, Key == 7]) == ["7"]
+	database.logSlowQueries(None)
+	assert log.handler is None
+	assert list(database[Label, Key == 8]) == ["8"]
+
+	records = [json.loads(line) for line in open(tmp_path / "slow.jsonl")]
+	lookups = [record for record in records if record["sql"].startswith("SELECT label")]
+	assert len(lookups) == 1
+	assert lookups[0]["params"] == ["?"]
+	assert lookups[0]["sampled"] is False
+	assert any("SCAN" in step["detail"] for step in lookups[0]["plan"])
+	assert set(lookups[0]).issuperset({"fingerprint", "wait", "execute", "fetch", "total"})
+	database.close()
+
+def test_index_advisor(tmp_path):
+
+	from SQLOOP.core import Column, Table
+	from SQLOOP._core.Advisor import constrainedColumns
+
+	assert constrainedColumns("SELECT a FROM t1 WHERE c > ? AND b == ? AND a IN (SELECT a FROM t2 WHERE d == ?)", "t1", ["a", "b", "c"]) == ("b", "a", "c")
+	assert constrainedColumns("SELECT a FROM t1 WHERE c > ? AND b == ? AND a IN (SELECT a FROM t2 WHERE d == ?)", "t2", ["a", "d"]) == ("d", )
+
+	class Key(Column, type=int): pass
+	class Label(Column, type=str): pass
+	class Genome(Column, type=int): pass
+
+	class LabelTable(Table):
+		A = Key
+		B = Label
+	
+	class GenomeTable(Table):
+		A = Key
+		B = Genome
+
+	class AdvisedDatabase(Database):
+		A = LabelTable
+		B = GenomeTable
+	
+	database = AdvisedDatabase(str(tmp_path / "advised.db"), "w")
+	database.fix()
+	database.insertMany(LabelTable, [(i, str(i)) for i in range(2000)])
+	database.insertMany(GenomeTable, [(i, i % 10) for i in range(2000)])
+
+	database.adviseIndexes(minRows=1000)
+	for i in range(5):
+		assert len(list(database[Label, Genome == i])) == 200
+	
+	proposals = database.indexAdvice()
+	assert {(str(proposal.table), tuple(map(str, proposal.columns))) for proposal in proposals} == {("label_table", ("key", )), ("genome_table", ("genome", ))}
+	assert all(proposal.count == 10 and not proposal.created for proposal in proposals)
+	assert "class AdvisedGenomeTableGenome(Index, name='advised_genome_table_genome'):\n\ttable = GenomeTable\n\tA = Genome" in map(str, proposals)
+
+	database.adviseIndexes(minRows=1000, autoCreate=True)
+	list(database[Label, Genome == 0])
+	assert all(proposal.created for proposal in database.indexAdvice())
+	list(database[Label, Genome == 0])
+	assert database.indexAdvice() == []
+	database.adviseIndexes(None)
+	database.close()
\ No newline at end of file